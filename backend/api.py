@@ -1,20 +1,38 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 import aiofiles
+import asyncio
+import copy
+import glob
+import hashlib
+import json
+import time
 import os
 import logging
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
 
-from parser import PCAPParser
-from flow import FlowReconstructor
-from features import FeatureExtractor
 from detectors.ml_classifier import MLTrafficClassifier
 from detectors.beaconing import BeaconingDetector
 from detectors.dns_tunnel import DNSTunnelDetector
 from detectors.protocol_anomaly import ProtocolAnomalyDetector
 from scorer import RiskScorer
 from report import ReportGenerator
+from pipeline import AnalysisPipeline
+from sampling import FlowSampler
+from progress import ProgressTracker
+from featurestore import FeatureStore
+from timeline import TrafficTimeline, DEFAULT_POINTS
+from hostgraph import HostGraph
+from jobstore import JobStore
+from workers import AnalysisWorkerPool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,13 +48,58 @@ app.add_middleware(
 )
 
 UPLOAD_DIR = "uploads"
+PCAP_EXTENSIONS = ('.pcap', '.pcapng', '.pcap.gz', '.pcapng.gz', '.pcap.xz', '.pcapng.xz')
+SSE_POLL_INTERVAL = 0.25
+POOL_JOB_TIMEOUT = 3600
+FEATURE_STORE_CACHE_SIZE = 4
+MAX_TIMELINE_POINTS = 5000
+MAX_GRAPH_HOPS = 4
+UPLOAD_CHUNK_SIZE = 1 << 20
+JOB_RETENTION_SECONDS = 24 * 3600
+ANALYSIS_CACHE_SIZE = 64
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-ml_classifier = MLTrafficClassifier()
+# An exported forest loads with NumPy only; without one the demo model is trained and exported
+MODEL_PATH = os.environ.get('NETSCAPEX_MODEL_PATH')
+ml_classifier = MLTrafficClassifier(MODEL_PATH)
+if MODEL_PATH and ml_classifier.model is not None:
+    # Trained here because no export existed; workers started together each train one,
+    # and all of them serve the first one exported
+    if not ml_classifier.save(MODEL_PATH, overwrite=False):
+        ml_classifier.load(MODEL_PATH)
 beaconing_detector = BeaconingDetector()
 dns_detector = DNSTunnelDetector()
 protocol_detector = ProtocolAnomalyDetector()
 risk_scorer = RiskScorer()
+pipeline = AnalysisPipeline(ml_classifier, beaconing_detector, dns_detector, protocol_detector, risk_scorer)
+
+
+def _analysis_fingerprint() -> str:
+    # Cached results are only valid for the model, detector settings and code that produced them
+    digest = hashlib.sha256()
+    model_arrays = [ml_classifier.scaler_mean, ml_classifier.scaler_scale, *ml_classifier.forest.to_arrays().values()]
+    for values in model_arrays:
+        digest.update(np.ascontiguousarray(values).tobytes())
+    for component in (beaconing_detector, dns_detector, protocol_detector, risk_scorer):
+        digest.update(json.dumps(vars(component), sort_keys=True, default=str).encode())
+    
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    for pattern in ('*.py', os.path.join('detectors', '*.py')):
+        for path in sorted(glob.glob(os.path.join(source_dir, pattern))):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+ANALYSIS_FINGERPRINT = _analysis_fingerprint()
+
+# Jobs, their events and finished analyses live in SQLite so every serving process shares them
+job_store = JobStore(os.path.join(UPLOAD_DIR, "netscapex.db"), JOB_RETENTION_SECONDS, ANALYSIS_CACHE_SIZE)
+feature_store_cache: OrderedDict = OrderedDict()
+feature_store_cache_lock = threading.Lock()
+
+# Set by serve.py; when present, CPU-heavy analyses run in its worker processes
+analysis_pool: Optional[AnalysisWorkerPool] = None
 
 
 @app.get("/")
@@ -52,21 +115,24 @@ async def root():
 @app.post("/api/upload")
 async def upload_pcap(file: UploadFile = File(...)):
     try:
-        if not file.filename.endswith(('.pcap', '.pcapng')):
-            raise HTTPException(status_code=400, detail="Invalid file format. Only .pcap or .pcapng allowed")
+        if not file.filename.endswith(PCAP_EXTENSIONS):
+            raise HTTPException(status_code=400, detail="Invalid file format. Only .pcap or .pcapng (optionally .gz/.xz compressed) allowed")
         
         file_path = os.path.join(UPLOAD_DIR, file.filename)
         
+        # Chunked copy keeps large (often compressed) archives out of memory
+        size = 0
         async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+                size += len(chunk)
         
-        logger.info(f"File uploaded: {file.filename} ({len(content)} bytes)")
+        logger.info(f"File uploaded: {file.filename} ({size} bytes)")
         
         return {
             "success": True,
             "filename": file.filename,
-            "size": len(content),
+            "size": size,
             "path": file_path
         }
         
@@ -76,7 +142,7 @@ async def upload_pcap(file: UploadFile = File(...)):
 
 
 @app.post("/api/analyze")
-async def analyze_pcap(data: dict):
+async def analyze_pcap(data: dict, background_tasks: BackgroundTasks):
     try:
         filename = data.get('filename')
         if not filename:
@@ -87,89 +153,504 @@ async def analyze_pcap(data: dict):
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        logger.info(f"Starting analysis of {filename}")
+        mode = data.get('mode', 'full')
+        if mode not in ('full', 'triage'):
+            raise HTTPException(status_code=400, detail="Mode must be 'full' or 'triage'")
         
-        parser = PCAPParser(file_path)
-        packets = parser.parse()
+        if mode == 'triage':
+            try:
+                sample_rate = data.get('sample_rate')
+                sampler = FlowSampler(0.05 if sample_rate is None else float(sample_rate))
+            except (TypeError, ValueError) as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
-        flow_reconstructor = FlowReconstructor(packets)
-        flows = flow_reconstructor.reconstruct()
+        # An exact result for the unchanged file beats both a rerun and a triage estimate
+        cached = job_store.get_cached(file_path, _file_signature(file_path))
+        if cached is not None:
+            logger.info(f"Serving cached analysis of {filename}")
+            return cached
         
-        feature_extractor = FeatureExtractor(flows)
-        flow_features = feature_extractor.extract_all()
+        logger.info(f"Starting {mode} analysis of {filename}")
         
-        analyzed_flows = []
-        
-        for flow_id, flow in flows.items():
-            features = flow_features[flow_id]
-            
-            ml_prob, ml_class = ml_classifier.predict(features)
+        if mode == 'triage':
+            # Triage still reads the whole capture, so it goes where full analyses go
+            if analysis_pool is not None:
+                analysis_result = await _run_on_pool(_run_triage_analysis, filename, file_path, sampler.sample_rate)
+            else:
+                # Pipeline work is CPU-bound; the threadpool keeps the event loop serving
+                analysis_result = await run_in_threadpool(_triage_file, filename, file_path, sampler)
             
-            beacon_score, beacon_detected, beacon_desc = beaconing_detector.detect(flow, features)
+            # Triage answers first; the exact report is produced behind it
+            job_id = _create_job(filename)
+            _dispatch(background_tasks, _run_full_analysis, job_id, filename, file_path)
+            analysis_result['background_job'] = job_id
             
-            dns_score, dns_detected, dns_desc = dns_detector.detect(flow)
-            
-            proto_score, proto_anomalies = protocol_detector.detect(flow)
-            
-            detections = {
-                'ml_probability': ml_prob,
-                'ml_classification': ml_class,
-                'beaconing_score': beacon_score,
-                'beaconing_detected': beacon_detected,
-                'beaconing_description': beacon_desc,
-                'dns_tunnel_score': dns_score,
-                'dns_tunnel_detected': dns_detected,
-                'dns_tunnel_description': dns_desc,
-                'protocol_anomaly_score': proto_score,
-                'protocol_anomalies': proto_anomalies
-            }
-            
-            risk_assessment = risk_scorer.calculate_risk(detections)
-            
-            analyzed_flows.append({
-                'flow_id': flow['flow_id'],
-                'src_ip': flow['src_ip'],
-                'dst_ip': flow['dst_ip'],
-                'protocol': flow['protocol'],
-                'src_port': flow['src_port'],
-                'dst_port': flow['dst_port'],
-                'packet_count': flow['packet_count'],
-                'total_bytes': flow['total_bytes'],
-                'duration': round(flow['duration'], 3),
-                'features': features,
-                'risk_assessment': risk_assessment
-            })
-        
-        analyzed_flows.sort(key=lambda x: x['risk_assessment']['risk_score'], reverse=True)
-        
-        protocol_dist = parser.get_protocol_distribution()
-        top_talkers = flow_reconstructor.get_top_talkers(10)
-        
-        analysis_result = {
-            'success': True,
-            'total_packets': len(packets),
-            'total_flows': len(flows),
-            'protocol_distribution': protocol_dist,
-            'top_talkers': [{'ip': ip, 'packet_count': count} for ip, count in top_talkers],
-            'flows': analyzed_flows[:100],  # Limit to top 100 for performance
-            'analysis_timestamp': datetime.now().isoformat()
-        }
-        
-        report_gen = ReportGenerator(filename)
-        json_report = report_gen.generate_json_report(analysis_result)
+            logger.info(f"Triage complete: ~{analysis_result['total_flows']} flows estimated")
+            return analysis_result
         
-        report_path = os.path.join(UPLOAD_DIR, f"{filename}_report.json")
-        report_gen.save_json(json_report, report_path)
+        if analysis_pool is not None:
+            analysis_result = await _run_on_pool(_run_full_analysis, filename, file_path)
+        else:
+            analysis_result = await run_in_threadpool(_analyze_file, filename, file_path)
         
-        logger.info(f"Analysis complete: {len(flows)} flows analyzed")
+        logger.info(f"Analysis complete: {analysis_result['total_flows']} flows analyzed")
         
         return analysis_result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/analyze/batch")
+async def analyze_batch(data: dict):
+    try:
+        filenames = data.get('filenames')
+        directory = data.get('directory')
+        
+        workers = _parse_workers(data.get('workers'))
+        
+        if directory:
+            dir_path = _upload_path(directory)
+            if not os.path.isdir(dir_path):
+                raise HTTPException(status_code=404, detail="Directory not found")
+            file_paths = [
+                os.path.join(dir_path, name) for name in sorted(os.listdir(dir_path))
+                if name.endswith(PCAP_EXTENSIONS)
+            ]
+            report_name = os.path.basename(dir_path)
+        elif filenames:
+            file_paths = [_upload_path(name) for name in filenames]
+            report_name = f"batch-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        else:
+            raise HTTPException(status_code=400, detail="Provide 'filenames' or 'directory'")
+        
+        missing = [os.path.basename(p) for p in file_paths if not os.path.exists(p)]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Files not found: {', '.join(missing)}")
+        if not file_paths:
+            raise HTTPException(status_code=400, detail="No capture files to analyze")
+        
+        logger.info(f"Starting batch analysis of {len(file_paths)} captures")
+        
+        if analysis_pool is not None:
+            analysis_result = await _run_on_pool(_run_batch_analysis, report_name, file_paths, workers)
+        else:
+            analysis_result = await run_in_threadpool(_analyze_batch, report_name, file_paths, workers)
+        
+        logger.info(f"Batch analysis complete: {analysis_result['total_flows']} flows, "
+                    f"{analysis_result['stitched_flows']} stitched across captures")
+        
+        return analysis_result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch analysis error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/rescore")
+async def rescore_analysis(data: dict):
+    try:
+        filename = data.get('filename')
+        if not filename:
+            raise HTTPException(status_code=400, detail="Filename required")
+        
+        store_path = _feature_store_path(filename)
+        if not os.path.exists(store_path):
+            raise HTTPException(status_code=404, detail="Feature store not found; run a full analysis first")
+        
+        try:
+            top = int(data.get('top', 100))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="'top' must be an integer")
+        if top < 1:
+            raise HTTPException(status_code=400, detail="'top' must be at least 1")
+        
+        try:
+            rescorer = _build_rescore_pipeline(data.get('weights') or {}, data.get('thresholds') or {})
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        started = time.perf_counter()
+        result = await run_in_threadpool(_rescore, rescorer, store_path, top)
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        
+        logger.info(f"Rescored {result['total_flows']} flows of {filename} in {result['elapsed_ms']} ms")
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Rescore error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/timeline/{filename}")
+async def get_timeline(filename: str, start: Optional[float] = None, end: Optional[float] = None,
+                       points: int = DEFAULT_POINTS):
+    try:
+        store_path = _feature_store_path(filename)
+        if not os.path.exists(store_path):
+            raise HTTPException(status_code=404, detail="Feature store not found; run a full analysis first")
+        
+        try:
+            # A cache miss decompresses the histograms and rebuilds every level
+            timeline = await run_in_threadpool(_load_cached, store_path, TrafficTimeline.load)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="No timeline stored; re-run the full analysis")
+        
+        try:
+            return timeline.query(start, end, min(points, MAX_TIMELINE_POINTS))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Timeline error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/graph/{filename}/neighbors")
+async def get_host_neighbors(filename: str, ip: str, direction: str = 'both', sort: str = 'bytes', limit: int = 50):
+    # Loading a graph and scanning its edges can take a while; keep both off the event loop
+    graph = await run_in_threadpool(_load_host_graph, filename)
+    try:
+        return await run_in_threadpool(graph.neighbors, ip, direction, sort, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Host {ip} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/graph/{filename}/rank")
+async def rank_hosts(filename: str, by: str = 'fan_out', limit: int = 20):
+    graph = await run_in_threadpool(_load_host_graph, filename)
+    try:
+        return {'by': by, 'hosts': await run_in_threadpool(graph.rank, by, limit)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/graph/{filename}/expand")
+async def expand_host(filename: str, ip: str, hops: int = 2, direction: str = 'both', max_nodes: int = 500):
+    if not 1 <= hops <= MAX_GRAPH_HOPS or max_nodes < 1:
+        raise HTTPException(status_code=400, detail=f"hops must be 1-{MAX_GRAPH_HOPS} and max_nodes positive")
+    graph = await run_in_threadpool(_load_host_graph, filename)
+    try:
+        return await run_in_threadpool(graph.expand, ip, hops, direction, max_nodes)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Host {ip} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/analyze/start")
+async def start_analysis(data: dict, background_tasks: BackgroundTasks):
+    filename = data.get('filename')
+    if not filename:
+        raise HTTPException(status_code=400, detail="Filename required")
+    
+    file_path = os.path.join(UPLOAD_DIR, filename)
+    
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    job_id = _create_job(filename)
+    _dispatch(background_tasks, _run_full_analysis, job_id, filename, file_path)
+    
+    logger.info(f"Queued analysis job {job_id} for {filename}")
+    
+    return {
+        'success': True,
+        'job_id': job_id,
+        'events': f"/api/jobs/{job_id}/events"
+    }
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    if job_store.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return StreamingResponse(
+        _job_event_stream(job_id),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _upload_path(name: str) -> str:
+    # Request-supplied names must resolve inside the upload directory
+    upload_root = os.path.realpath(UPLOAD_DIR)
+    path = os.path.realpath(os.path.join(upload_root, str(name)))
+    if os.path.commonpath([upload_root, path]) != upload_root:
+        raise HTTPException(status_code=400, detail="Path must stay inside the upload directory")
+    return path
+
+
+def _parse_workers(value) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        workers = int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="'workers' must be an integer")
+    if workers < 1:
+        raise HTTPException(status_code=400, detail="'workers' must be at least 1")
+    return min(workers, os.cpu_count() or 1)
+
+
+def _save_report(filename: str, analysis_result: Dict, suffix: str = "report"):
+    report_gen = ReportGenerator(filename)
+    json_report = report_gen.generate_json_report(analysis_result)
+    
+    report_path = os.path.join(UPLOAD_DIR, f"{filename}_{suffix}.json")
+    report_gen.save_json(json_report, report_path)
+
+
+def _file_signature(file_path: str) -> str:
+    stat = os.stat(file_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{ANALYSIS_FINGERPRINT}"
+
+
+def _analyze_file(filename: str, file_path: str, progress: Optional[ProgressTracker] = None) -> Dict:
+    signature = _file_signature(file_path)
+    analysis_result = pipeline.run(file_path, progress=progress, store_path=_feature_store_path(filename))
+    _save_report(filename, analysis_result)
+    job_store.set_cached(file_path, signature, analysis_result)
+    return analysis_result
+
+
+def _triage_file(filename: str, file_path: str, sampler: FlowSampler) -> Dict:
+    analysis_result = pipeline.run(file_path, sampler)
+    _save_report(filename, analysis_result, suffix="triage_report")
+    return analysis_result
+
+
+def _analyze_batch(report_name: str, file_paths: List[str], workers: Optional[int]) -> Dict:
+    analysis_result = pipeline.run_batch(file_paths, workers, _feature_store_path(report_name))
+    _save_report(report_name, analysis_result)
+    analysis_result['report'] = f"{report_name}_report.json"
+    return analysis_result
+
+
+def _rescore(rescorer: AnalysisPipeline, store_path: str, top_n: int) -> Dict:
+    return rescorer.rescore(_load_feature_store(store_path), top_n)
+
+
+def _feature_store_path(name: str) -> str:
+    return os.path.join(UPLOAD_DIR, f"{name}_features.npz")
+
+
+def _load_feature_store(store_path: str) -> FeatureStore:
+    return _load_cached(store_path, FeatureStore.load)
+
+
+def _load_host_graph(filename: str) -> HostGraph:
+    store_path = _feature_store_path(filename)
+    if not os.path.exists(store_path):
+        raise HTTPException(status_code=404, detail="Feature store not found; run a full analysis first")
+    try:
+        return _load_cached(store_path, HostGraph.load)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="No host graph stored; re-run the full analysis")
+
+
+def _load_cached(store_path: str, loader: Callable):
+    # Rescores load from threadpool threads, so the LRU is only touched under its lock
+    key = (loader.__qualname__, store_path, os.path.getmtime(store_path))
+    with feature_store_cache_lock:
+        value = feature_store_cache.pop(key, None)
+    if value is None:
+        value = loader(store_path)
+    
+    with feature_store_cache_lock:
+        feature_store_cache[key] = value
+        while len(feature_store_cache) > FEATURE_STORE_CACHE_SIZE:
+            feature_store_cache.popitem(last=False)
+    return value
+
+
+def _build_rescore_pipeline(weights: Dict, thresholds: Dict) -> AnalysisPipeline:
+    if not isinstance(weights, dict) or not isinstance(thresholds, dict):
+        raise ValueError("'weights' and 'thresholds' must be objects")
+    
+    scorer = copy.deepcopy(risk_scorer)
+    for name, value in weights.items():
+        if name not in scorer.weights:
+            raise ValueError(f"Unknown weight '{name}'")
+        scorer.weights[name] = float(value)
+    
+    detectors = {
+        'beaconing': copy.deepcopy(beaconing_detector),
+        'dns_tunnel': copy.deepcopy(dns_detector),
+        'protocol_anomaly': copy.deepcopy(protocol_detector)
+    }
+    for detector_name, overrides in thresholds.items():
+        detector = detectors.get(detector_name)
+        if detector is None:
+            raise ValueError(f"Unknown detector '{detector_name}'")
+        if not isinstance(overrides, dict):
+            raise ValueError(f"Thresholds for '{detector_name}' must be an object")
+        for name, value in overrides.items():
+            current = getattr(detector, name, None) if not name.startswith('_') else None
+            if current is None or callable(current):
+                raise ValueError(f"Unknown threshold '{detector_name}.{name}'")
+            if isinstance(current, dict):
+                if not isinstance(value, dict):
+                    raise ValueError(f"Threshold '{detector_name}.{name}' must be an object")
+                value = {**current, **{key: _threshold_entry(f"{detector_name}.{name}", current, key, entry)
+                                        for key, entry in value.items()}}
+            else:
+                value = float(value)
+            setattr(detector, name, value)
+    
+    return AnalysisPipeline(
+        ml_classifier,
+        detectors['beaconing'],
+        detectors['dns_tunnel'],
+        detectors['protocol_anomaly'],
+        scorer
+    )
+
+
+def _threshold_entry(threshold: str, current: Dict, key: str, value):
+    # Entries keep the shape the detectors expect, e.g. port lists stay lists for np.isin and `in`
+    if key not in current:
+        raise ValueError(f"Unknown threshold '{threshold}.{key}'")
+    if isinstance(current[key], list):
+        if not isinstance(value, list):
+            raise ValueError(f"Threshold '{threshold}.{key}' must be a list")
+        return [int(item) for item in value]
+    return float(value)
+
+
+def _create_job(filename: str) -> str:
+    job_id = uuid.uuid4().hex
+    job_store.create_job(job_id, filename)
+    return job_id
+
+
+def _dispatch(background_tasks: BackgroundTasks, func: Callable, *args):
+    if analysis_pool is not None:
+        analysis_pool.submit(func, *args)
+    else:
+        background_tasks.add_task(func, *args)
+
+
+async def _run_on_pool(func: Callable, name: str, *args) -> Dict:
+    # The HTTP worker only waits; the result comes back through the job's event log
+    job_id = _create_job(name)
+    analysis_pool.submit(func, job_id, name, *args)
+    
+    seq = -1
+    deadline = time.monotonic() + POOL_JOB_TIMEOUT
+    while time.monotonic() < deadline:
+        for seq, event, payload in job_store.get_events(job_id, seq):
+            if event == 'complete':
+                return json.loads(payload)
+            if event == 'error':
+                raise RuntimeError(json.loads(payload)['detail'])
+        await asyncio.sleep(SSE_POLL_INTERVAL)
+    
+    # The job itself keeps running; its result can still be followed by id
+    raise HTTPException(status_code=504, detail=f"Analysis did not finish within {POOL_JOB_TIMEOUT}s; follow job {job_id}")
+
+
+def _job_callback(job_id: str):
+    def callback(event: str, payload: Dict):
+        # Progress snapshots replace each other; pushed flows and results are kept for replay
+        if event == 'progress':
+            job_store.set_progress(job_id, payload)
+        else:
+            job_store.append_event(job_id, event, payload)
+    
+    return callback
+
+
+def fail_worker_jobs(pid: int):
+    # Called by the pool when an analysis worker dies mid-task
+    failed = job_store.fail_unfinished(f"Analysis worker {pid} exited unexpectedly", worker_pid=pid)
+    for job_id in failed:
+        logger.error(f"Job {job_id} failed: analysis worker {pid} exited")
+
+
+def _run_full_analysis(job_id: str, filename: str, file_path: str):
+    job_store.update_job(job_id, status='running')
+    progress = ProgressTracker(os.path.getsize(file_path), _job_callback(job_id))
+    _run_job(job_id, filename, lambda: _analyze_file(filename, file_path, progress))
+
+
+def _run_triage_analysis(job_id: str, filename: str, file_path: str, sample_rate: float):
+    job_store.update_job(job_id, status='running')
+    _run_job(job_id, f"{filename}_triage", lambda: _triage_file(filename, file_path, FlowSampler(sample_rate)))
+
+
+def _run_batch_analysis(job_id: str, report_name: str, file_paths: List[str], workers: Optional[int]):
+    job_store.update_job(job_id, status='running')
+    _run_job(job_id, report_name, lambda: _analyze_batch(report_name, file_paths, workers))
+
+
+def _run_job(job_id: str, name: str, analyze: Callable[[], Dict]):
+    try:
+        analysis_result = analyze()
+        job_store.append_event(job_id, 'complete', analysis_result)
+        job_store.update_job(
+            job_id,
+            status='complete',
+            report=f"{name}_report.json",
+            total_packets=analysis_result['total_packets'],
+            total_flows=analysis_result['total_flows'],
+            finished=datetime.now().isoformat()
+        )
+        logger.info(f"Background analysis complete for {name}")
+        
+    except Exception as e:
+        logger.error(f"Background analysis error: {str(e)}")
+        job_store.append_event(job_id, 'error', {'detail': str(e)})
+        job_store.update_job(job_id, status='failed', error=str(e), finished=datetime.now().isoformat())
+
+
+async def _job_event_stream(job_id: str):
+    sent = -1
+    progress_seq = -1
+    
+    while True:
+        # Read status before draining so a terminal event appended first is never missed
+        job = job_store.get_job(job_id)
+        finished = job['status'] in ('complete', 'failed')
+        
+        if job['progress_seq'] != progress_seq:
+            progress_seq = job['progress_seq']
+            yield _sse('progress', json.dumps(job['progress']))
+        
+        for sent, event, payload in job_store.get_events(job_id, sent):
+            yield _sse(event, payload)
+        
+        if finished:
+            return
+        
+        await asyncio.sleep(SSE_POLL_INTERVAL)
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
 @app.get("/api/download/{filename}")
 async def download_report(filename: str):
     try:
@@ -0,0 +1,198 @@
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+from functools import reduce
+from typing import Dict, Iterator, List, Optional
+import logging
+
+from parser import PCAPParser
+from sketches import TrafficSummary
+
+logger = logging.getLogger(__name__)
+
+# A decoder that sends nothing for this long is treated as hung
+DECODER_STALL_TIMEOUT = 120.0
+
+
+def _decode_capture(pcap_path: str, capture_index: int, out_queue, chunk_size: int):
+    # Runs in a child process; chunks amortise queue pickling over many packets
+    try:
+        summary = TrafficSummary()
+        parser = PCAPParser(pcap_path, summary)
+        chunk = []
+        
+        for packet_data in parser.iter_packets():
+            packet_data['capture_index'] = capture_index
+            chunk.append(packet_data)
+            if len(chunk) >= chunk_size:
+                out_queue.put(chunk)
+                chunk = []
+                
+        if chunk:
+            out_queue.put(chunk)
+        out_queue.put(('done', {'packets': parser.packets_seen, 'ingest': parser.ingest_stats()}, summary))
+        
+    except Exception as e:
+        out_queue.put(('error', f"{os.path.basename(pcap_path)}: {str(e)}", None))
+
+
+class _CaptureStream:
+    
+    def __init__(self, pcap_path: str, capture_index: int, ctx, chunk_size: int, prefetch: int):
+        self.pcap_path = pcap_path
+        self.capture_index = capture_index
+        self.ctx = ctx
+        self.chunk_size = chunk_size
+        self.queue = ctx.Queue(maxsize=prefetch)
+        self.process = None
+        self.start_time = PCAPParser(pcap_path).peek_start_time()
+        self.packets_seen = 0
+        self.ingest: Optional[Dict] = None
+        self.summary: Optional[TrafficSummary] = None
+        
+    def start(self):
+        if self.process is None:
+            self.process = self.ctx.Process(
+                target=_decode_capture,
+                args=(self.pcap_path, self.capture_index, self.queue, self.chunk_size),
+                daemon=True
+            )
+            self.process.start()
+            
+    def __iter__(self) -> Iterator[Dict]:
+        self.start()
+        deadline = time.monotonic() + DECODER_STALL_TIMEOUT
+        while True:
+            try:
+                message = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                if self.process.is_alive():
+                    if time.monotonic() < deadline:
+                        continue
+                    raise RuntimeError(f"Decoder for {os.path.basename(self.pcap_path)} stalled for "
+                                       f"{DECODER_STALL_TIMEOUT:.0f}s")
+                try:
+                    message = self.queue.get_nowait()
+                except queue.Empty:
+                    raise RuntimeError(f"Decoder for {os.path.basename(self.pcap_path)} exited unexpectedly")
+                    
+            if isinstance(message, list):
+                yield from message
+                deadline = time.monotonic() + DECODER_STALL_TIMEOUT
+                continue
+                
+            status, detail, summary = message
+            if status == 'error':
+                raise RuntimeError(detail)
+            self.packets_seen = detail['packets']
+            self.ingest = detail['ingest']
+            self.summary = summary
+            return
+            
+    def close(self):
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join()
+            self.process = None
+
+
+class MultiCaptureParser:
+    
+    def __init__(self, pcap_paths: List[str], workers: Optional[int] = None,
+                 chunk_size: int = 2048, prefetch: int = 8):
+        self.pcap_paths = pcap_paths
+        self.workers = workers or min(len(pcap_paths), os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.prefetch = prefetch
+        self.packets = []
+        self.capture_stats = []
+        self.summary: Optional[TrafficSummary] = None
+        
+    def parse(self) -> List[Dict]:
+        logger.info(f"Loading {len(self.pcap_paths)} PCAP files")
+        
+        for packet_data in self.iter_packets():
+            self.packets.append(packet_data)
+            
+        logger.info(f"Merged {len(self.packets)} packets from {len(self.pcap_paths)} captures")
+        return self.packets
+        
+    def iter_packets(self) -> Iterator[Dict]:
+        # Batches run from threadpool threads, and forking a multi-threaded process can
+        # copy a held lock into the decoder; the fork server is a clean single-threaded
+        # parent with the parser already imported
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(['batch'])
+        streams = [
+            _CaptureStream(path, idx, ctx, self.chunk_size, self.prefetch)
+            for idx, path in enumerate(self.pcap_paths)
+        ]
+        
+        # Rotated captures mostly follow one another in time; merging in start order
+        # keeps only overlapping files open while `workers` decoders read ahead
+        ordered = sorted(streams, key=lambda s: s.start_time if s.start_time is not None else float('-inf'))
+        for stream in ordered[:self.workers]:
+            stream.start()
+            
+        pending = list(reversed(ordered))
+        heap = []
+        seq = 0
+        
+        try:
+            while pending or heap:
+                while pending and (not heap or pending[-1].start_time is None
+                                   or pending[-1].start_time <= heap[0][0]):
+                    self._activate(pending.pop(), heap, ordered)
+                    
+                if not heap:
+                    continue
+                    
+                ts, capture_index, packet_data, packet_iter = heapq.heappop(heap)
+                packet_data['packet_id'] = seq
+                seq += 1
+                yield packet_data
+                
+                next_packet = next(packet_iter, None)
+                if next_packet is not None:
+                    heapq.heappush(heap, (next_packet['timestamp'], capture_index, next_packet, packet_iter))
+                else:
+                    self._start_next(ordered)
+                    
+            self.capture_stats = [
+                {'file': os.path.basename(s.pcap_path), 'packets': s.packets_seen,
+                 'start_time': s.start_time, 'ingest': s.ingest}
+                for s in streams
+            ]
+            summaries = [s.summary for s in streams if s.summary is not None]
+            self.summary = reduce(lambda a, b: a.merge(b), summaries) if summaries else None
+            
+        finally:
+            for stream in streams:
+                stream.close()
+                
+    def get_packet_count(self) -> int:
+        return len(self.packets)
+        
+    def get_protocol_distribution(self) -> Dict[str, int]:
+        protocols = {}
+        for pkt in self.packets:
+            proto = pkt['protocol']
+            protocols[proto] = protocols.get(proto, 0) + 1
+        return protocols
+        
+    def _activate(self, stream: _CaptureStream, heap: List, ordered: List[_CaptureStream]):
+        packet_iter = iter(stream)
+        first = next(packet_iter, None)
+        if first is not None:
+            heapq.heappush(heap, (first['timestamp'], stream.capture_index, first, packet_iter))
+        else:
+            self._start_next(ordered)
+            
+    def _start_next(self, ordered: List[_CaptureStream]):
+        for stream in ordered:
+            if stream.process is None:
+                stream.start()
+                return
@@ -56,6 +56,19 @@ class BeaconingDetector:
             logger.error(f"Beaconing detection error: {str(e)}")
             return 0.0, False, "Analysis error"
     
+    def score_batch(self, packet_count: np.ndarray, iat_cv: np.ndarray, mean_size: np.ndarray,
+                    src_port: np.ndarray, dst_port: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Vectorised detect() over stored per-flow inputs; ports use -1 for None
+        score = np.where(iat_cv < self.iat_variance_threshold, 0.4, 0.0)
+        score = score + np.where(mean_size < 200, 0.3, 0.0)
+        score = score + np.where((src_port > 1024) & (dst_port < 1024), 0.3, 0.0)
+        
+        # detect() bails out on short flows and errors on port-less ones
+        valid = (packet_count >= 5) & (src_port >= 0) & ~((src_port > 1024) & (dst_port < 0))
+        score = np.where(valid, score, 0.0)
+        
+        return score, score >= 0.7
+    
     def _is_outbound_dominant(self, flow: Dict) -> bool:
         src_port = flow.get('src_port', 0)
         dst_port = flow.get('dst_port', 0)
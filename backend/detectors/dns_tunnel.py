@@ -1,4 +1,5 @@
 import math
+import numpy as np
 from typing import Dict, Tuple, List
 import logging
 
@@ -65,6 +66,30 @@ class DNSTunnelDetector:
             logger.error(f"DNS tunnel detection error: {str(e)}")
             return 0.0, False, "Analysis error"
     
+    def score_batch(self, is_dns: np.ndarray, query_offsets: np.ndarray, avg_entropy: np.ndarray,
+                    query_entropy: np.ndarray, subdomain_length: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Vectorised detect() over stored per-query entropy/length, grouped by query_offsets
+        query_count = np.diff(query_offsets)
+        
+        long_queries = subdomain_length > self.length_threshold
+        suspicious = (query_entropy > self.entropy_threshold) | long_queries
+        
+        long_count = self._segment_sum(long_queries, query_offsets)
+        suspicious_count = self._segment_sum(suspicious, query_offsets)
+        
+        score = np.where(avg_entropy > self.entropy_threshold, 0.5, 0.0)
+        score = score + np.where(long_count > 0, 0.3, 0.0)
+        score = score + np.where(suspicious_count > query_count * 0.5, 0.2, 0.0)
+        
+        valid = is_dns & (query_count > 0)
+        score = np.where(valid, score, 0.0)
+        
+        return np.minimum(score, 1.0), score >= 0.6
+    
+    def _segment_sum(self, values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        cumulative = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+        return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+    
     def _extract_subdomain(self, domain: str) -> str:
         parts = domain.split('.')
         if len(parts) > 2:
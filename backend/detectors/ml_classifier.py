@@ -1,25 +1,38 @@
+import os
+import tempfile
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-import pickle
 import logging
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from detectors.tree_ensemble import CompiledForest
 
 logger = logging.getLogger(__name__)
 
 
 class MLTrafficClassifier:    
-    def __init__(self):
+    def __init__(self, model_path: Optional[str] = None):
         self.model = None
-        self.scaler = StandardScaler()
-        self._initialize_model()
+        self.scaler = None
+        self.forest = None
+        self.scaler_mean = None
+        self.scaler_scale = None
+        
+        if model_path and os.path.exists(model_path):
+            self.load(model_path)
+        else:
+            self._initialize_model()
         
     def _initialize_model(self):
+        # Training stays on sklearn; imported here so workers serving an exported model never load it
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+        
         self.model = RandomForestClassifier(
             n_estimators=50,
             max_depth=10,
             random_state=42
         )
+        self.scaler = StandardScaler()
         
         X_train = np.random.rand(100, 8)
         y_train = np.random.randint(0, 2, 100)
@@ -28,30 +41,81 @@ class MLTrafficClassifier:
         X_scaled = self.scaler.transform(X_train)
         self.model.fit(X_scaled, y_train)
         
+        self.forest = CompiledForest.from_sklearn(self.model)
+        self.scaler_mean = self.scaler.mean_
+        self.scaler_scale = self.scaler.scale_
+        
         logger.info("ML classifier initialized")
     
+    def save(self, model_path: str, overwrite: bool = True) -> bool:
+        # Unique temp file per writer; returns False if overwrite is off and the file exists
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(model_path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, scaler_mean=self.scaler_mean, scaler_scale=self.scaler_scale, **self.forest.to_arrays())
+            if overwrite:
+                os.replace(tmp_path, model_path)
+            else:
+                # link() never replaces, so of several processes exporting at once exactly one wins
+                os.link(tmp_path, model_path)
+        except FileExistsError:
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+                
+        logger.info(f"ML classifier exported to {model_path}")
+        return True
+    
+    def load(self, model_path: str):
+        with np.load(model_path) as data:
+            arrays = {name: data[name] for name in data.files}
+        
+        self.scaler_mean = arrays.pop('scaler_mean')
+        self.scaler_scale = arrays.pop('scaler_scale')
+        self.forest = CompiledForest.from_arrays(arrays)
+        logger.info(f"ML classifier loaded from {model_path}")
+    
     def predict(self, features: Dict) -> Tuple[float, str]:
         try:
             feature_vector = self._extract_feature_vector(features)
             
-            X = self.scaler.transform([feature_vector])
-            
-            proba = self.model.predict_proba(X)[0]
+            proba = self._predict_proba(feature_vector[np.newaxis, :])[0]
             probability = float(proba[1])  # Probability of encrypted traffic
             
-            if probability > 0.75:
-                classification = "High Risk Encrypted Traffic"
-            elif probability > 0.5:
-                classification = "Moderate Risk"
-            else:
-                classification = "Normal Traffic"
-                
-            return probability, classification
+            return self.classify(probability)
             
         except Exception as e:
             logger.error(f"ML prediction error: {str(e)}")
             return 0.5, "Unknown"
     
+    def predict_batch(self, features_list: List[Dict]) -> List[Tuple[float, str]]:
+        if not features_list:
+            return []
+        
+        try:
+            X = np.array([self._extract_feature_vector(features) for features in features_list])
+            probabilities = self._predict_proba(X)[:, 1]
+            return [self.classify(float(p)) for p in probabilities]
+            
+        except Exception as e:
+            logger.error(f"ML batch prediction error: {str(e)}")
+            return [self.predict(features) for features in features_list]
+    
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X_scaled = (X - self.scaler_mean) / self.scaler_scale
+        return self.forest.predict_proba(X_scaled)
+    
+    def classify(self, probability: float) -> Tuple[float, str]:
+        if probability > 0.75:
+            classification = "High Risk Encrypted Traffic"
+        elif probability > 0.5:
+            classification = "Moderate Risk"
+        else:
+            classification = "Normal Traffic"
+            
+        return probability, classification
+    
     def _extract_feature_vector(self, features: Dict) -> np.ndarray:
         return np.array([
             features['mean_packet_size'],
@@ -1,3 +1,4 @@
+import numpy as np
 from typing import Dict, Tuple, List
 import logging
 
@@ -53,6 +54,26 @@ class ProtocolAnomalyDetector:
             logger.error(f"Protocol anomaly detection error: {str(e)}")
             return 0.0, []
     
+    def score_batch(self, protocol: np.ndarray, src_port: np.ndarray, dst_port: np.ndarray,
+                    is_dns: np.ndarray, likely_encrypted: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Vectorised detect(); ports use -1 for None
+        is_tcp = protocol == 'TCP'
+        
+        https_like = ~np.isin(dst_port, self.standard_ports['HTTPS']) & (dst_port > 1024) & is_tcp & likely_encrypted
+        http_like = ~np.isin(dst_port, self.standard_ports['HTTP']) & (dst_port > 8000) & is_tcp
+        dns_off_port = is_dns & (dst_port != 53)
+        peer_to_peer = (src_port > 1024) & (dst_port > 1024)
+        
+        score = np.where(https_like, 0.4, 0.0)
+        score = score + np.where(http_like, 0.3, 0.0)
+        score = score + np.where(dns_off_port, 0.5, 0.0)
+        score = score + np.where(peer_to_peer, 0.2, 0.0)
+        
+        valid = (dst_port > 0) & (src_port >= 0)
+        anomalous = valid & (https_like | http_like | dns_off_port | peer_to_peer)
+        
+        return np.where(valid, np.minimum(score, 1.0), 0.0), anomalous
+    
     def _is_likely_encrypted(self, flow: Dict) -> bool:
         sizes = flow['packet_sizes']
         mean_size = sum(sizes) / len(sizes) if sizes else 0
@@ -0,0 +1,109 @@
+import numpy as np
+from typing import Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+LEAF = -1
+CHUNK_ROWS = 2048
+
+
+class CompiledForest:
+    # A trained tree ensemble flattened into contiguous node arrays. Every tree's
+    # nodes live in one global index space, so a batch walks all trees at once with
+    # a fixed number of vectorised steps (the maximum depth) and no sklearn import.
+    
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray, max_depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        
+        # Interleaved [left, right] pairs: the child of node n is children[2n + went_right]
+        self._children = np.stack([left, right], axis=1).ravel().astype(np.int64)
+        
+    @classmethod
+    def from_sklearn(cls, model) -> 'CompiledForest':
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == LEAF
+            
+            # Leaves point at themselves so finished samples stay put while deeper trees advance
+            node_ids = np.arange(tree.node_count) + offset
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            
+            counts = tree.value[:, 0, :]
+            values.append(counts / counts.sum(axis=1, keepdims=True))
+            
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+            
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max_depth
+        )
+        
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # sklearn evaluates splits on float32 inputs; match it so borderline values agree
+        X = np.asarray(X, dtype=np.float32)
+        
+        # Chunking bounds the (samples x trees) node-index working set
+        if X.shape[0] <= CHUNK_ROWS:
+            return self._predict_chunk(X)
+        return np.concatenate([
+            self._predict_chunk(X[start:start + CHUNK_ROWS]) for start in range(0, X.shape[0], CHUNK_ROWS)
+        ])
+        
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_samples, n_features = X.shape
+        
+        flat_X = X.ravel()
+        row_base = (np.arange(n_samples, dtype=np.int64) * n_features)[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots.astype(np.int64), (n_samples, len(self.roots))).copy()
+        
+        for _ in range(self.max_depth):
+            values = np.take(flat_X, row_base + np.take(self.feature, nodes))
+            went_right = ~(values <= np.take(self.threshold, nodes))
+            nodes = np.take(self._children, nodes * 2 + went_right)
+            
+        return np.take(self.value, nodes, axis=0).mean(axis=1)
+        
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'roots': self.roots,
+            'max_depth': np.array(self.max_depth)
+        }
+        
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'CompiledForest':
+        return cls(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            left=arrays['left'],
+            right=arrays['right'],
+            value=arrays['value'],
+            roots=arrays['roots'],
+            max_depth=int(arrays['max_depth'])
+        )
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = [
+    'packet_count', 'total_bytes', 'duration', 'packets_per_second', 'bytes_per_second',
+    'mean_packet_size', 'std_packet_size', 'min_packet_size', 'max_packet_size',
+    'mean_iat', 'std_iat', 'min_iat', 'max_iat', 'burst_count'
+]
+INT_FEATURE_COLUMNS = {'packet_count', 'total_bytes', 'burst_count'}
+
+
+class FeatureStore:
+    # Columnar per-analysis store: one row per flow plus ragged per-packet and per-query
+    # arrays addressed by offsets, so detectors can be re-run without the pcap
+    
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        
+    def __len__(self) -> int:
+        return len(self.columns['flow_id'])
+        
+    @classmethod
+    def build(cls, flows: Dict[int, Dict], flow_features: Dict[int, Dict], analyzed_flows: List[Dict],
+              dns_detector, protocol_detector) -> 'FeatureStore':
+        packet_offsets = [0]
+        query_offsets = [0]
+        timestamps, packet_sizes = [], []
+        queries, query_entropy, subdomain_length = [], [], []
+        iat_cv, mean_size, likely_encrypted, dns_avg_entropy = [], [], [], []
+        
+        for flow in flows.values():
+            timestamps.extend(flow['timestamps'])
+            packet_sizes.extend(flow['packet_sizes'])
+            packet_offsets.append(len(timestamps))
+            
+            # Threshold-independent detector inputs, computed exactly as the detectors do
+            iat = np.diff(flow['timestamps'])
+            if len(iat) > 0:
+                mean_iat = np.mean(iat)
+                iat_cv.append(np.std(iat) / mean_iat if mean_iat > 0 else float('inf'))
+            else:
+                iat_cv.append(float('nan'))
+            mean_size.append(np.mean(flow['packet_sizes']))
+            likely_encrypted.append(protocol_detector._is_likely_encrypted(flow))
+            
+            total_entropy = 0
+            for query in flow['dns_queries']:
+                subdomain = dns_detector._extract_subdomain(query)
+                entropy = dns_detector._shannon_entropy(subdomain)
+                total_entropy += entropy
+                queries.append(query)
+                query_entropy.append(entropy)
+                subdomain_length.append(len(subdomain))
+            query_offsets.append(len(queries))
+            dns_avg_entropy.append(
+                total_entropy / len(flow['dns_queries']) if flow['dns_queries'] else float('nan')
+            )
+            
+        flow_list = list(flows.values())
+        feature_list = [flow_features[flow_id] for flow_id in flows]
+        
+        columns = {
+            'flow_id': np.array([f['flow_id'] for f in flow_list], dtype=str),
+            'src_ip': np.array([f['src_ip'] for f in flow_list], dtype=str),
+            'dst_ip': np.array([f['dst_ip'] for f in flow_list], dtype=str),
+            'protocol': np.array([str(f['protocol']) for f in flow_list], dtype=str),
+            'src_port': np.array([-1 if f['src_port'] is None else f['src_port'] for f in flow_list], dtype=np.int32),
+            'dst_port': np.array([-1 if f['dst_port'] is None else f['dst_port'] for f in flow_list], dtype=np.int32),
+            'packet_count': np.array([f['packet_count'] for f in flow_list], dtype=np.int64),
+            'total_bytes': np.array([f['total_bytes'] for f in flow_list], dtype=np.int64),
+            'duration': np.array([f['duration'] for f in flow_list], dtype=np.float64),
+            'is_dns': np.array([f['is_dns'] for f in flow_list], dtype=bool),
+            'features': np.array(
+                [[feat[name] for name in FEATURE_COLUMNS] for feat in feature_list], dtype=np.float64
+            ).reshape(len(flow_list), len(FEATURE_COLUMNS)),
+            'ml_probability': np.array(
+                [a['risk_assessment']['detections'].get('ml_probability', 0.5) for a in analyzed_flows],
+                dtype=np.float64
+            ),
+            'iat_cv': np.array(iat_cv, dtype=np.float64),
+            'mean_size': np.array(mean_size, dtype=np.float64),
+            'likely_encrypted': np.array(likely_encrypted, dtype=bool),
+            'dns_avg_entropy': np.array(dns_avg_entropy, dtype=np.float64),
+            'packet_offsets': np.array(packet_offsets, dtype=np.int64),
+            'timestamps': np.array(timestamps, dtype=np.float64),
+            'packet_sizes': np.array(packet_sizes, dtype=np.int32),
+            'query_offsets': np.array(query_offsets, dtype=np.int64),
+            'queries': np.array(queries, dtype=str),
+            'query_entropy': np.array(query_entropy, dtype=np.float64),
+            'subdomain_length': np.array(subdomain_length, dtype=np.int32)
+        }
+        
+        return cls(columns)
+        
+    def save(self, path: str):
+        # Unique temp file per writer: concurrent analyses of one capture, in any
+        # process or thread, must not share it
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, **self.columns)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"Feature store saved to {path} ({len(self)} flows)")
+        
+    @classmethod
+    def load(cls, path: str) -> 'FeatureStore':
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+            
+    def flow(self, idx: int) -> Dict:
+        c = self.columns
+        p_start, p_end = c['packet_offsets'][idx], c['packet_offsets'][idx + 1]
+        q_start, q_end = c['query_offsets'][idx], c['query_offsets'][idx + 1]
+        protocol = str(c['protocol'][idx])
+        
+        return {
+            'flow_id': str(c['flow_id'][idx]),
+            'src_ip': str(c['src_ip'][idx]),
+            'dst_ip': str(c['dst_ip'][idx]),
+            'protocol': int(protocol) if protocol.isdigit() else protocol,
+            'src_port': self._port(c['src_port'][idx]),
+            'dst_port': self._port(c['dst_port'][idx]),
+            'packet_count': int(c['packet_count'][idx]),
+            'total_bytes': int(c['total_bytes'][idx]),
+            'duration': float(c['duration'][idx]),
+            'timestamps': c['timestamps'][p_start:p_end].tolist(),
+            'packet_sizes': c['packet_sizes'][p_start:p_end].tolist(),
+            'is_dns': bool(c['is_dns'][idx]),
+            'dns_queries': c['queries'][q_start:q_end].tolist()
+        }
+        
+    def features(self, idx: int) -> Dict:
+        c = self.columns
+        features = {}
+        for name, value in zip(FEATURE_COLUMNS, c['features'][idx]):
+            features[name] = int(value) if name in INT_FEATURE_COLUMNS else float(value)
+            
+        protocol = str(c['protocol'][idx])
+        features.update({
+            'is_dns': bool(c['is_dns'][idx]),
+            'protocol': int(protocol) if protocol.isdigit() else protocol,
+            'src_port': self._port(c['src_port'][idx]) or 0,
+            'dst_port': self._port(c['dst_port'][idx]) or 0
+        })
+        return features
+        
+    def _port(self, value) -> Optional[int]:
+        return None if value < 0 else int(value)
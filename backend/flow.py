@@ -36,14 +36,19 @@ class FlowReconstructor:
     
     def _create_flow_key(self, src_ip: str, dst_ip: str, protocol: str, 
                          src_port: Optional[int], dst_port: Optional[int]) -> str:
- 
+        key_string = self.canonical_key(src_ip, dst_ip, protocol, src_port, dst_port)
+        return hashlib.md5(key_string.encode()).hexdigest()[:16]
+    
+    @staticmethod
+    def canonical_key(src_ip: str, dst_ip: str, protocol: str,
+                      src_port: Optional[int], dst_port: Optional[int]) -> str:
+        # Direction-independent 5-tuple string; both sides of a conversation map to the same key
         if src_ip < dst_ip:
             ip_tuple = (src_ip, dst_ip, src_port or 0, dst_port or 0)
         else:
             ip_tuple = (dst_ip, src_ip, dst_port or 0, src_port or 0)
             
-        key_string = f"{ip_tuple[0]}:{ip_tuple[1]}:{protocol}:{ip_tuple[2]}:{ip_tuple[3]}"
-        return hashlib.md5(key_string.encode()).hexdigest()[:16]
+        return f"{ip_tuple[0]}:{ip_tuple[1]}:{protocol}:{ip_tuple[2]}:{ip_tuple[3]}"
     
     def _create_flow_object(self, flow_id: int, flow_key: str, packets: List[Dict]) -> Dict:
         packets_sorted = sorted(packets, key=lambda x: x['timestamp'])
@@ -0,0 +1,246 @@
+import numpy as np
+from typing import Dict, List
+import logging
+
+from timeline import RISK_EVENT_LEVELS
+
+logger = logging.getLogger(__name__)
+
+EDGE_COLUMNS = ('flows', 'packets', 'bytes', 'max_risk', 'risk_events')
+DIRECTIONS = ('out', 'in', 'both')
+
+
+class HostGraph:
+    # Host-level communication graph in CSR form. Hosts are integer-encoded by their
+    # position in the sorted `hosts` array; out-edges of host h are the slice
+    # out_offsets[h]:out_offsets[h + 1] of the edge arrays, sorted by target. The
+    # in-direction is a second offset array over a permutation of the same edges.
+    
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.hosts = arrays['hosts']
+        self.out_offsets = arrays['out_offsets']
+        self.targets = arrays['targets']
+        self.in_offsets = arrays['in_offsets']
+        self.in_edges = arrays['in_edges']
+        self.edges = {name: arrays[name] for name in EDGE_COLUMNS}
+        self.sources = np.repeat(np.arange(len(self.hosts)), np.diff(self.out_offsets))
+        self._host_totals = None
+        
+    @classmethod
+    def from_analysis(cls, flows: Dict[int, Dict], analyzed_flows: List[Dict]) -> 'HostGraph':
+        # analyzed_flows must still be in flow order, i.e. before sorting by risk
+        flow_list = list(flows.values())
+        assessments = [a['risk_assessment'] for a in analyzed_flows]
+        
+        return cls.build(
+            np.array([f['src_ip'] for f in flow_list], dtype=str),
+            np.array([f['dst_ip'] for f in flow_list], dtype=str),
+            np.fromiter((f['packet_count'] for f in flow_list), dtype=np.int64, count=len(flow_list)),
+            np.fromiter((f['total_bytes'] for f in flow_list), dtype=np.int64, count=len(flow_list)),
+            np.fromiter((a['risk_score'] for a in assessments), dtype=np.float64, count=len(assessments)),
+            np.fromiter((a['risk_level'] in RISK_EVENT_LEVELS for a in assessments), dtype=bool, count=len(assessments))
+        )
+        
+    @classmethod
+    def build(cls, src_ip: np.ndarray, dst_ip: np.ndarray, packets: np.ndarray, total_bytes: np.ndarray,
+              risk: np.ndarray, risk_events: np.ndarray) -> 'HostGraph':
+        hosts, codes = np.unique(np.concatenate([src_ip, dst_ip]), return_inverse=True)
+        n_hosts = len(hosts)
+        src, dst = codes[:len(src_ip)].astype(np.int64), codes[len(src_ip):].astype(np.int64)
+        
+        # Sorting by (src, dst) key groups a host's out-edges contiguously, which is the CSR layout
+        edge_keys, edge_of_flow = np.unique(src * n_hosts + dst, return_inverse=True)
+        n_edges = len(edge_keys)
+        sources, targets = edge_keys // n_hosts, edge_keys % n_hosts
+        
+        max_risk = np.zeros(n_edges)
+        np.maximum.at(max_risk, edge_of_flow, risk)
+        
+        in_edges = np.argsort(targets, kind='stable')
+        
+        return cls({
+            'hosts': hosts,
+            'out_offsets': np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=n_hosts))]),
+            'targets': targets,
+            'in_offsets': np.concatenate([[0], np.cumsum(np.bincount(targets, minlength=n_hosts))]),
+            'in_edges': in_edges,
+            'flows': np.bincount(edge_of_flow, minlength=n_edges),
+            'packets': np.bincount(edge_of_flow, weights=packets, minlength=n_edges).astype(np.int64),
+            'bytes': np.bincount(edge_of_flow, weights=total_bytes, minlength=n_edges).astype(np.int64),
+            'max_risk': max_risk,
+            'risk_events': np.bincount(edge_of_flow, weights=risk_events, minlength=n_edges).astype(np.int64)
+        })
+        
+    def host_index(self, ip: str) -> int:
+        idx = int(np.searchsorted(self.hosts, ip))
+        if idx >= len(self.hosts) or self.hosts[idx] != ip:
+            raise KeyError(ip)
+        return idx
+        
+    def neighbors(self, ip: str, direction: str = 'both', sort_by: str = 'bytes', limit: int = 50) -> Dict:
+        self._check(direction, sort_by)
+        host = self.host_index(ip)
+        
+        entries = []
+        if direction in ('out', 'both'):
+            out = np.arange(self.out_offsets[host], self.out_offsets[host + 1])
+            entries.append((out, self.targets[out], 'out'))
+        if direction in ('in', 'both'):
+            inc = self.in_edges[self.in_offsets[host]:self.in_offsets[host + 1]]
+            entries.append((inc, self.sources[inc], 'in'))
+            
+        edges = np.concatenate([e for e, _, _ in entries])
+        peers = np.concatenate([p for _, p, _ in entries])
+        labels = np.concatenate([np.full(len(e), d) for e, _, d in entries])
+        
+        order = self._top(self.edges[sort_by][edges], limit)
+        
+        return {
+            'ip': ip,
+            'fan_out': int(self.out_offsets[host + 1] - self.out_offsets[host]),
+            'fan_in': int(self.in_offsets[host + 1] - self.in_offsets[host]),
+            'neighbors': [
+                {'ip': str(self.hosts[peers[i]]), 'direction': str(labels[i]), **self._edge(edges[i])}
+                for i in order
+            ]
+        }
+        
+    def rank(self, by: str = 'fan_out', limit: int = 20) -> List[Dict]:
+        if by not in ('fan_out', 'fan_in'):
+            raise ValueError("Rank must be by 'fan_out' or 'fan_in'")
+            
+        totals = self._totals()
+        order = self._top(totals[by], limit)
+        
+        return [
+            {
+                'ip': str(self.hosts[h]),
+                'fan_out': int(totals['fan_out'][h]),
+                'fan_in': int(totals['fan_in'][h]),
+                'flows_sent': int(totals['flows'][h]),
+                'packets_sent': int(totals['packets'][h]),
+                'bytes_sent': int(totals['bytes'][h]),
+                'risk_events': int(totals['risk_events'][h]),
+                'max_risk': round(float(totals['max_risk'][h]), 2)
+            }
+            for h in order
+        ]
+        
+    def expand(self, ip: str, hops: int = 2, direction: str = 'both', max_nodes: int = 500) -> Dict:
+        self._check(direction, 'bytes')
+        start = self.host_index(ip)
+        
+        depth = np.full(len(self.hosts), -1, dtype=np.int64)
+        depth[start] = 0
+        frontier = np.array([start])
+        truncated = False
+        
+        for hop in range(1, hops + 1):
+            reached = []
+            if direction in ('out', 'both'):
+                reached.append(self.targets[self._gather(self.out_offsets, frontier)])
+            if direction in ('in', 'both'):
+                reached.append(self.sources[self.in_edges[self._gather(self.in_offsets, frontier)]])
+                
+            frontier = np.unique(np.concatenate(reached))
+            frontier = frontier[depth[frontier] < 0]
+            
+            budget = max_nodes - int((depth >= 0).sum())
+            if len(frontier) > budget:
+                frontier = frontier[:budget]
+                truncated = True
+            depth[frontier] = hop
+            if len(frontier) == 0 or truncated:
+                break
+                
+        nodes = np.flatnonzero(depth >= 0)
+        in_subgraph = depth >= 0
+        edges = np.flatnonzero(in_subgraph[self.sources] & in_subgraph[self.targets])
+        
+        return {
+            'ip': ip,
+            'hops': hops,
+            'truncated': truncated,
+            'nodes': [{'ip': str(self.hosts[h]), 'hop': int(depth[h])} for h in nodes],
+            'edges': [
+                {'src_ip': str(self.hosts[self.sources[e]]), 'dst_ip': str(self.hosts[self.targets[e]]), **self._edge(e)}
+                for e in edges
+            ]
+        }
+        
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {
+            'hosts': self.hosts,
+            'out_offsets': self.out_offsets,
+            'targets': self.targets,
+            'in_offsets': self.in_offsets,
+            'in_edges': self.in_edges,
+            **self.edges
+        }
+        return {f"graph_{name}": values for name, values in arrays.items()}
+        
+    @classmethod
+    def load(cls, path: str) -> 'HostGraph':
+        with np.load(path) as data:
+            if 'graph_hosts' not in data.files:
+                raise KeyError(f"No host graph in {path}")
+            return cls({name[len('graph_'):]: data[name] for name in data.files if name.startswith('graph_')})
+            
+    def _totals(self) -> Dict[str, np.ndarray]:
+        # Per-host totals are segment reductions over each host's CSR slice, computed once
+        if self._host_totals is None:
+            totals = {name: self._segment_sum(self.edges[name], self.out_offsets)
+                      for name in ('flows', 'packets', 'bytes', 'risk_events')}
+            totals['fan_out'] = np.diff(self.out_offsets)
+            totals['fan_in'] = np.diff(self.in_offsets)
+            totals['max_risk'] = np.maximum(
+                self._segment_max(self.edges['max_risk'], self.out_offsets),
+                self._segment_max(self.edges['max_risk'][self.in_edges], self.in_offsets)
+            )
+            self._host_totals = totals
+        return self._host_totals
+        
+    def _top(self, values: np.ndarray, limit: int) -> np.ndarray:
+        # Partial selection first; only the kept entries are fully sorted
+        limit = max(limit, 0)
+        if limit < len(values):
+            candidates = np.argpartition(-values, limit)[:limit]
+        else:
+            candidates = np.arange(len(values))
+        return candidates[np.argsort(-values[candidates], kind='stable')]
+        
+    def _edge(self, edge: int) -> Dict:
+        return {
+            'flows': int(self.edges['flows'][edge]),
+            'packets': int(self.edges['packets'][edge]),
+            'bytes': int(self.edges['bytes'][edge]),
+            'max_risk': round(float(self.edges['max_risk'][edge]), 2),
+            'risk_events': int(self.edges['risk_events'][edge])
+        }
+        
+    def _gather(self, offsets: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        # Concatenated CSR slices for many rows without a Python loop
+        starts = offsets[rows]
+        lengths = offsets[rows + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        segment_base = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return segment_base + np.arange(total)
+        
+    def _segment_sum(self, values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        sums = np.concatenate([[0], np.cumsum(values)])
+        return sums[offsets[1:]] - sums[offsets[:-1]]
+        
+    def _segment_max(self, values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        result = np.zeros(len(offsets) - 1)
+        non_empty = offsets[1:] > offsets[:-1]
+        if len(values):
+            result[non_empty] = np.maximum.reduceat(values, offsets[:-1][non_empty])
+        return result
+        
+    def _check(self, direction: str, sort_by: str):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Direction must be one of {', '.join(DIRECTIONS)}")
+        if sort_by not in EDGE_COLUMNS:
+            raise ValueError(f"Sort must be one of {', '.join(EDGE_COLUMNS)}")
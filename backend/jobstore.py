@@ -0,0 +1,199 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    progress TEXT NOT NULL DEFAULT '{}',
+    progress_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    func TEXT NOT NULL,
+    args TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    cache_key TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created TEXT NOT NULL
+);
+"""
+
+
+class JobStore:
+    # Job registry, job event log and analysis cache in one SQLite file, so every
+    # HTTP and analysis worker process sees the same state. Connections are opened
+    # per call, which keeps the store safe across fork() and worker threads, and
+    # read-modify-write updates take the write lock up front so they cannot interleave.
+    # Finished jobs and their events are dropped after retention_seconds, and the
+    # analysis cache keeps only the cache_size most recently stored results.
+    
+    def __init__(self, db_path: str, retention_seconds: float = 86400, cache_size: int = 64):
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self.cache_size = cache_size
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            
+    def create_job(self, job_id: str, filename: str) -> Dict:
+        job = {
+            'job_id': job_id,
+            'filename': filename,
+            'status': 'queued',
+            'created': datetime.now().isoformat()
+        }
+        with self._connect() as conn:
+            self._prune_jobs(conn)
+            conn.execute("INSERT INTO jobs (job_id, data) VALUES (?, ?)", (job_id, json.dumps(job)))
+        return job
+        
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data, progress, progress_seq FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+            
+        job = json.loads(row[0])
+        job['progress'] = json.loads(row[1])
+        job['progress_seq'] = row[2]
+        return job
+        
+    def update_job(self, job_id: str, **fields):
+        with self._connect(immediate=True) as conn:
+            self._update_job(conn, job_id, fields)
+            
+    def set_progress(self, job_id: str, progress: Dict):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, progress_seq = progress_seq + 1 WHERE job_id = ?",
+                (json.dumps(progress, default=str), job_id)
+            )
+            
+    def enqueue_task(self, job_id: str, func: str, args: List):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO tasks (job_id, func, args) VALUES (?, ?, ?)", (job_id, func, json.dumps(args))
+            )
+            
+    def claim_task(self, worker_pid: int) -> Optional[Tuple[str, str, List]]:
+        # Removing the task and recording its worker in one transaction means a worker
+        # that dies holding a task always leaves a job that fail_unfinished can find.
+        # Idle workers poll, so an empty queue is answered without the write lock.
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is None:
+                return None
+                
+        with self._connect(immediate=True) as conn:
+            row = conn.execute("SELECT seq, job_id, func, args FROM tasks ORDER BY seq LIMIT 1").fetchone()
+            if row is None:
+                return None
+            seq, job_id, func, args = row
+            conn.execute("DELETE FROM tasks WHERE seq = ?", (seq,))
+            conn.execute("UPDATE jobs SET data = json_set(data, '$.worker_pid', ?) WHERE job_id = ?",
+                         (worker_pid, job_id))
+        return job_id, func, json.loads(args)
+        
+    def fail_unfinished(self, detail: str, worker_pid: Optional[int] = None) -> List[str]:
+        # Jobs whose process is gone never reach a terminal event on their own. With a
+        # worker_pid only the jobs that worker was running are failed, else every open job.
+        # One transaction, so a job that finishes meanwhile is either seen finished or not at all
+        with self._connect(immediate=True) as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE json_extract(data, '$.status') IN ('queued', 'running') "
+                "AND (? IS NULL OR json_extract(data, '$.worker_pid') = ?)",
+                (worker_pid, worker_pid)
+            ).fetchall()
+            
+            job_ids = [row[0] for row in rows]
+            for job_id in job_ids:
+                conn.execute("DELETE FROM tasks WHERE job_id = ?", (job_id,))
+                self._append_event(conn, job_id, 'error', {'detail': detail})
+                self._update_job(conn, job_id, {'status': 'failed', 'error': detail,
+                                                'finished': datetime.now().isoformat()})
+        return job_ids
+        
+    def append_event(self, job_id: str, event: str, payload: Dict):
+        with self._connect() as conn:
+            self._append_event(conn, job_id, event, payload)
+            
+    def get_events(self, job_id: str, after_seq: int = -1) -> List[Tuple[int, str, str]]:
+        # Payloads stay serialised; the SSE stream forwards them verbatim
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT seq, event, payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq)
+            ).fetchall()
+            
+    def get_cached(self, cache_key: str, signature: str) -> Optional[Dict]:
+        # A changed signature (e.g. the file was re-uploaded) makes the entry stale
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM analysis_cache WHERE cache_key = ? AND signature = ?", (cache_key, signature)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+        
+    def set_cached(self, cache_key: str, signature: str, result: Dict):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, signature, result, created) VALUES (?, ?, ?, ?)",
+                (cache_key, signature, json.dumps(result, default=str), datetime.now().isoformat())
+            )
+            conn.execute(
+                "DELETE FROM analysis_cache WHERE cache_key NOT IN "
+                "(SELECT cache_key FROM analysis_cache ORDER BY created DESC LIMIT ?)",
+                (self.cache_size,)
+            )
+            
+    def _prune_jobs(self, conn: sqlite3.Connection):
+        # Open jobs are never pruned, however old; their events are still being streamed
+        cutoff = (datetime.now() - timedelta(seconds=self.retention_seconds)).isoformat()
+        expired = (
+            "SELECT job_id FROM jobs WHERE json_extract(data, '$.status') IN ('complete', 'failed') "
+            "AND COALESCE(json_extract(data, '$.finished'), json_extract(data, '$.created')) < ?"
+        )
+        conn.execute(f"DELETE FROM job_events WHERE job_id IN ({expired})", (cutoff,))
+        conn.execute(f"DELETE FROM jobs WHERE job_id IN ({expired})", (cutoff,))
+            
+    def _update_job(self, conn: sqlite3.Connection, job_id: str, fields: Dict):
+        row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        job = json.loads(row[0])
+        job.update(fields)
+        conn.execute("UPDATE jobs SET data = ? WHERE job_id = ?", (json.dumps(job, default=str), job_id))
+        
+    def _append_event(self, conn: sqlite3.Connection, job_id: str, event: str, payload: Dict):
+        conn.execute(
+            "INSERT INTO job_events (job_id, seq, event, payload) "
+            "SELECT ?, COALESCE(MAX(seq), -1) + 1, ?, ? FROM job_events WHERE job_id = ?",
+            (job_id, event, json.dumps(payload, default=str), job_id)
+        )
+        
+    @contextmanager
+    def _connect(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        # Commits on success, rolls back on error and always closes the connection
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                if immediate:
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+        finally:
+            conn.close()
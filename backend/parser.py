@@ -1,29 +1,49 @@
-from scapy.all import rdpcap, IP, TCP, UDP, DNS, ICMP, IPv6
-from typing import List, Dict, Optional
+from scapy.all import PcapReader, RawPcapReader, conf, IP, TCP, UDP, DNS, ICMP, IPv6
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Iterator
+import gzip
+import io
+import lzma
+import os
+import time
 import logging
 
+from sampling import FlowSampler
+from sketches import TrafficSummary
+from progress import ProgressTracker
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+READ_BUFFER_SIZE = 1 << 20
+GZIP_MAGIC = b'\x1f\x8b'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+
 
 class PCAPParser:
     
-    def __init__(self, pcap_path: str):
+    def __init__(self, pcap_path: str, summary: Optional[TrafficSummary] = None,
+                 progress: Optional[ProgressTracker] = None):
         self.pcap_path = pcap_path
+        self.summary = summary
+        self.progress = progress
         self.packets = []
+        self.packets_seen = 0
+        self.bytes_seen = 0
+        self.bytes_read = 0
+        self.bytes_decoded = 0
+        self.compression = None
+        self.ingest_seconds = 0.0
+        self._source = None
         
-    def parse(self) -> List[Dict]:
+    def parse(self, sampler: Optional[FlowSampler] = None) -> List[Dict]:
         try:
             logger.info(f"Loading PCAP file: {self.pcap_path}")
-            packets = rdpcap(self.pcap_path)
-            logger.info(f"Loaded {len(packets)} packets")
             
-            for idx, pkt in enumerate(packets):
-                packet_data = self._extract_metadata(pkt, idx)
-                if packet_data:
-                    self.packets.append(packet_data)
+            for packet_data in self.iter_packets(sampler):
+                self.packets.append(packet_data)
                     
-            logger.info(f"Extracted metadata from {len(self.packets)} packets")
+            logger.info(f"Extracted metadata from {len(self.packets)} of {self.packets_seen} packets")
             return self.packets
             
         except FileNotFoundError:
@@ -33,6 +53,109 @@ class PCAPParser:
             logger.error(f"Error parsing PCAP: {str(e)}")
             raise
     
+    def iter_packets(self, sampler: Optional[FlowSampler] = None) -> Iterator[Dict]:
+        source = self._iter_sampled(sampler) if sampler is not None else self._iter_all()
+        started = time.perf_counter()
+        
+        for packet_data in source:
+            if self.summary is not None:
+                self.summary.update(packet_data)
+            if self.progress is not None:
+                self.progress.on_packet(packet_data, self.bytes_read)
+            yield packet_data
+            
+        self.ingest_seconds = time.perf_counter() - started
+        stats = self.ingest_stats()
+        logger.info(f"Read {self.pcap_path} ({stats['compression']}) at {stats['compressed_mb_per_sec']} MB/s "
+                    f"compressed, {stats['uncompressed_mb_per_sec']} MB/s uncompressed")
+    
+    def ingest_stats(self) -> Dict:
+        compressed = os.path.getsize(self.pcap_path)
+        seconds = self.ingest_seconds
+        return {
+            'compression': self.compression or 'none',
+            'compressed_bytes': compressed,
+            'uncompressed_bytes': self.bytes_decoded,
+            'seconds': round(seconds, 3),
+            'compressed_mb_per_sec': round(compressed / seconds / 1e6, 2) if seconds > 0 else None,
+            'uncompressed_mb_per_sec': round(self.bytes_decoded / seconds / 1e6, 2) if seconds > 0 else None
+        }
+    
+    def peek_start_time(self) -> Optional[float]:
+        with self._open_capture() as stream:
+            first = next(iter(PcapReader(stream)), None)
+        return float(first.time) if first is not None else None
+    
+    @contextmanager
+    def _open_capture(self) -> Iterator[io.BufferedIOBase]:
+        # Compressed captures are decoded in-stream rather than to disk. The raw handle's
+        # position tracks progress against the on-disk size; large buffers on both sides
+        # keep the readers' small header reads off the decompressor.
+        raw = open(self.pcap_path, 'rb', buffering=READ_BUFFER_SIZE)
+        self._source = stream = raw
+        try:
+            magic = raw.peek(len(XZ_MAGIC))[:len(XZ_MAGIC)]
+            if magic.startswith(GZIP_MAGIC):
+                self.compression = 'gzip'
+                stream = io.BufferedReader(gzip.GzipFile(fileobj=raw), READ_BUFFER_SIZE)
+            elif magic.startswith(XZ_MAGIC):
+                self.compression = 'xz'
+                stream = io.BufferedReader(lzma.LZMAFile(raw), READ_BUFFER_SIZE)
+                
+            yield stream
+            self.bytes_decoded = stream.tell()
+        finally:
+            stream.close()
+            raw.close()
+    
+    def _iter_all(self) -> Iterator[Dict]:
+        with self._open_capture() as stream:
+            reader = PcapReader(stream)
+            for idx, pkt in enumerate(reader):
+                self.packets_seen += 1
+                self.bytes_seen += len(pkt)
+                self.bytes_read = self._source.tell()
+                packet_data = self._extract_metadata(pkt, idx)
+                if packet_data:
+                    yield packet_data
+    
+    def _iter_sampled(self, sampler: FlowSampler) -> Iterator[Dict]:
+        with self._open_capture() as stream:
+            reader = RawPcapReader(stream)
+            linktype = getattr(reader, 'linktype', None)
+            if linktype is not None:
+                yield from self._iter_raw_sampled(reader, linktype, sampler)
+                return
+                
+        # pcapng carries per-interface link types; decide after full dissection
+        for packet_data in self._iter_all():
+            if sampler.keep(packet_data):
+                yield packet_data
+    
+    def _iter_raw_sampled(self, reader, linktype: int, sampler: FlowSampler) -> Iterator[Dict]:
+        ll_cls = conf.l2types.num2layer.get(linktype, conf.raw_layer)
+        ts_scale = 1e-9 if reader.nano else 1e-6
+        
+        for idx, (raw, meta) in enumerate(reader):
+            self.packets_seen += 1
+            self.bytes_seen += len(raw)
+            self.bytes_read = self._source.tell()
+            
+            # Header peek skips dissection of unsampled flows; None means undecided
+            decision = sampler.keep_raw(raw, linktype, idx)
+            if decision is False:
+                continue
+            
+            try:
+                pkt = ll_cls(raw)
+            except Exception:
+                pkt = conf.raw_layer(raw)
+            pkt.time = meta.sec + meta.usec * ts_scale
+            
+            packet_data = self._extract_metadata(pkt, idx)
+            if packet_data and (decision or sampler.keep(packet_data)):
+                yield packet_data
+    
     def _extract_metadata(self, pkt, idx: int) -> Optional[Dict]:
         try:
             metadata = {
@@ -0,0 +1,235 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from parser import PCAPParser
+from batch import MultiCaptureParser
+from flow import FlowReconstructor
+from features import FeatureExtractor
+from sampling import FlowSampler
+from sketches import TrafficSummary
+from progress import ProgressTracker
+from featurestore import FeatureStore
+from timeline import TrafficTimeline, COUNT_SERIES
+from hostgraph import HostGraph
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisPipeline:
+    
+    def __init__(self, ml_classifier, beaconing_detector, dns_detector, protocol_detector, risk_scorer):
+        self.ml_classifier = ml_classifier
+        self.beaconing_detector = beaconing_detector
+        self.dns_detector = dns_detector
+        self.protocol_detector = protocol_detector
+        self.risk_scorer = risk_scorer
+        
+    def run(self, file_path: str, sampler: Optional[FlowSampler] = None,
+            progress: Optional[ProgressTracker] = None, store_path: Optional[str] = None) -> Dict:
+        # Sketches over a flow sample would be biased; triage reports its own estimates
+        summary = TrafficSummary() if sampler is None else None
+        
+        if progress is not None:
+            progress.set_stage('parsing')
+        
+        parser = PCAPParser(file_path, summary, progress)
+        packets = parser.parse(sampler)
+        
+        analysis_result, flows = self.analyze_packets(
+            packets, parser.get_protocol_distribution(), progress,
+            store_path if sampler is None else None
+        )
+        
+        analysis_result['ingest'] = parser.ingest_stats()
+        if summary is not None:
+            analysis_result['traffic_summary'] = summary.to_dict()
+        
+        if sampler is not None:
+            estimates = sampler.estimate(flows, packets)
+            analysis_result.update({
+                'mode': 'triage',
+                'total_packets': parser.packets_seen,
+                'total_bytes': parser.bytes_seen,
+                'total_flows': round(estimates['total_flows']['estimate']),
+                'protocol_distribution': {
+                    proto: round(e['estimate']) for proto, e in estimates['protocol_distribution'].items()
+                },
+                'top_talkers': [
+                    {'ip': t['ip'], 'packet_count': round(t['estimate']), 'lower': t['lower'], 'upper': t['upper']}
+                    for t in estimates['top_talkers']
+                ],
+                # Whole flows are kept with probability sample_rate, so bins scale like the totals
+                'timeline': [
+                    {**point, **{name: round(point[name] / sampler.sample_rate) for name in COUNT_SERIES}}
+                    for point in analysis_result['timeline']
+                ],
+                'estimates': estimates
+            })
+            
+        return analysis_result
+        
+    def run_batch(self, file_paths: List[str], workers: Optional[int] = None,
+                  store_path: Optional[str] = None) -> Dict:
+        parser = MultiCaptureParser(file_paths, workers)
+        packets = parser.parse()
+        
+        analysis_result, flows = self.analyze_packets(
+            packets, parser.get_protocol_distribution(), store_path=store_path
+        )
+        
+        # Flows are keyed over the merged stream, so a conversation crossing a
+        # rotation boundary is reconstructed once with all of its packets
+        stitched = sum(
+            1 for flow in flows.values()
+            if len({p['capture_index'] for p in flow['packets']}) > 1
+        )
+        
+        analysis_result.update({
+            'mode': 'batch',
+            'captures': parser.capture_stats,
+            'stitched_flows': stitched
+        })
+        if parser.summary is not None:
+            analysis_result['traffic_summary'] = parser.summary.to_dict()
+            
+        return analysis_result
+        
+    def analyze_packets(self, packets: List[Dict], protocol_dist: Dict,
+                        progress: Optional[ProgressTracker] = None,
+                        store_path: Optional[str] = None) -> Tuple[Dict, Dict[int, Dict]]:
+        if progress is not None:
+            progress.set_stage('reconstructing', packets=len(packets))
+        
+        flow_reconstructor = FlowReconstructor(packets)
+        flows = flow_reconstructor.reconstruct()
+        
+        if progress is not None:
+            progress.set_stage('extracting_features', flows=len(flows))
+        
+        feature_extractor = FeatureExtractor(flows)
+        flow_features = feature_extractor.extract_all()
+        
+        if progress is not None:
+            progress.set_stage('scoring', flows=len(flows))
+        
+        analyzed_flows = self.analyze_flows(flows, flow_features, progress)
+        timeline = TrafficTimeline.from_analysis(packets, flows, analyzed_flows)
+        
+        if store_path is not None:
+            store = FeatureStore.build(flows, flow_features, analyzed_flows, self.dns_detector, self.protocol_detector)
+            store.columns.update(timeline.to_arrays())
+            store.columns.update(HostGraph.from_analysis(flows, analyzed_flows).to_arrays())
+            store.save(store_path)
+        
+        analyzed_flows.sort(key=lambda x: x['risk_assessment']['risk_score'], reverse=True)
+        
+        top_talkers = flow_reconstructor.get_top_talkers(10)
+        
+        analysis_result = {
+            'success': True,
+            'mode': 'full',
+            'total_packets': len(packets),
+            'total_flows': len(flows),
+            'protocol_distribution': protocol_dist,
+            'top_talkers': [{'ip': ip, 'packet_count': count} for ip, count in top_talkers],
+            'flows': analyzed_flows[:100],  # Limit to top 100 for performance
+            'timeline': timeline.query()['points'],
+            'analysis_timestamp': datetime.now().isoformat()
+        }
+        
+        return analysis_result, flows
+        
+    def rescore(self, store: FeatureStore, top_n: int = 100) -> Dict:
+        c = store.columns
+        
+        # Every flow is scored with vectorised detectors; only the top N are re-run
+        # through the per-flow path to rebuild full assessments
+        beacon_score, _ = self.beaconing_detector.score_batch(
+            c['packet_count'], c['iat_cv'], c['mean_size'], c['src_port'], c['dst_port']
+        )
+        dns_score, _ = self.dns_detector.score_batch(
+            c['is_dns'], c['query_offsets'], c['dns_avg_entropy'], c['query_entropy'], c['subdomain_length']
+        )
+        proto_score, _ = self.protocol_detector.score_batch(
+            c['protocol'], c['src_port'], c['dst_port'], c['is_dns'], c['likely_encrypted']
+        )
+        
+        risk = self.risk_scorer.calculate_risk_batch(c['ml_probability'], beacon_score, dns_score, proto_score)
+        levels, counts = np.unique(self.risk_scorer.classify_batch(risk), return_counts=True)
+        
+        top = [int(i) for i in np.argsort(-risk, kind='stable')[:top_n]]
+        flows = {i: store.flow(i) for i in top}
+        flow_features = {i: store.features(i) for i in top}
+        ml_predictions = {i: self.ml_classifier.classify(float(c['ml_probability'][i])) for i in top}
+        
+        analyzed_flows = self.analyze_flows(flows, flow_features, ml_predictions=ml_predictions)
+        analyzed_flows.sort(key=lambda x: x['risk_assessment']['risk_score'], reverse=True)
+        
+        return {
+            'success': True,
+            'total_flows': len(store),
+            'risk_distribution': {str(level): int(count) for level, count in zip(levels, counts)},
+            'flows': analyzed_flows,
+            'weights': dict(self.risk_scorer.weights),
+            'analysis_timestamp': datetime.now().isoformat()
+        }
+        
+    def analyze_flows(self, flows: Dict[int, Dict], flow_features: Dict[int, Dict],
+                      progress: Optional[ProgressTracker] = None,
+                      ml_predictions: Optional[Dict[int, Tuple[float, str]]] = None) -> List[Dict]:
+        analyzed_flows = []
+        
+        if ml_predictions is None:
+            # One vectorised pass over every flow instead of a model call per flow
+            ml_predictions = dict(zip(
+                flows.keys(),
+                self.ml_classifier.predict_batch([flow_features[flow_id] for flow_id in flows])
+            ))
+        
+        for flow_id, flow in flows.items():
+            features = flow_features[flow_id]
+            
+            ml_prob, ml_class = ml_predictions[flow_id]
+            
+            beacon_score, beacon_detected, beacon_desc = self.beaconing_detector.detect(flow, features)
+            
+            dns_score, dns_detected, dns_desc = self.dns_detector.detect(flow)
+            
+            proto_score, proto_anomalies = self.protocol_detector.detect(flow)
+            
+            detections = {
+                'ml_probability': ml_prob,
+                'ml_classification': ml_class,
+                'beaconing_score': beacon_score,
+                'beaconing_detected': beacon_detected,
+                'beaconing_description': beacon_desc,
+                'dns_tunnel_score': dns_score,
+                'dns_tunnel_detected': dns_detected,
+                'dns_tunnel_description': dns_desc,
+                'protocol_anomaly_score': proto_score,
+                'protocol_anomalies': proto_anomalies
+            }
+            
+            risk_assessment = self.risk_scorer.calculate_risk(detections)
+            
+            analyzed_flows.append({
+                'flow_id': flow['flow_id'],
+                'src_ip': flow['src_ip'],
+                'dst_ip': flow['dst_ip'],
+                'protocol': flow['protocol'],
+                'src_port': flow['src_port'],
+                'dst_port': flow['dst_port'],
+                'packet_count': flow['packet_count'],
+                'total_bytes': flow['total_bytes'],
+                'duration': round(flow['duration'], 3),
+                'features': features,
+                'risk_assessment': risk_assessment
+            })
+            
+            if progress is not None:
+                progress.on_flow_scored(len(analyzed_flows), len(flows), analyzed_flows[-1])
+            
+        return analyzed_flows
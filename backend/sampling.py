@@ -0,0 +1,162 @@
+import hashlib
+import math
+import socket
+import struct
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from flow import FlowReconstructor
+
+logger = logging.getLogger(__name__)
+
+LINKTYPE_ETHERNET = 1
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_ARP = 0x0806
+VLAN_ETHERTYPES = (0x8100, 0x88A8)
+
+# UDP ports Scapy decodes into encapsulated IP, where the flow key comes from the inner header
+TUNNEL_UDP_PORTS = {1701, 2152, 3544, 4341, 4789, 6081, 8472}
+
+Z_95 = 1.96
+NON_IP = ()
+
+
+class FlowSampler:
+    
+    def __init__(self, sample_rate: float = 0.05, seed: int = 0):
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+            
+        self.sample_rate = sample_rate
+        self.seed = seed
+        self._threshold = int(sample_rate * 2 ** 64)
+        self._salt = seed.to_bytes(8, 'little')
+        
+    def keep(self, pkt: Dict) -> bool:
+        if not pkt['src_ip'] or not pkt['dst_ip']:
+            return self._hash_keep(f"pkt:{pkt['packet_id']}")
+            
+        return self._hash_keep(FlowReconstructor.canonical_key(
+            pkt['src_ip'],
+            pkt['dst_ip'],
+            pkt['protocol'],
+            pkt.get('src_port'),
+            pkt.get('dst_port')
+        ))
+        
+    def keep_raw(self, raw: bytes, linktype: int, idx: int) -> Optional[bool]:
+        five_tuple = self._peek_five_tuple(raw, linktype)
+        
+        if five_tuple is None:
+            return None
+        if not five_tuple:  # NON_IP
+            return self._hash_keep(f"pkt:{idx}")
+            
+        return self._hash_keep(FlowReconstructor.canonical_key(*five_tuple))
+        
+    def estimate(self, flows: Dict[int, Dict], packets: List[Dict], top_n: int = 10) -> Dict:
+        protocol_units = defaultdict(list)
+        talker_units = defaultdict(list)
+        
+        for flow in flows.values():
+            protocol_units[flow['protocol']].append(flow['packet_count'])
+            talker_units[flow['src_ip']].append(flow['packet_count'])
+            
+        # Packets without an IP pair never form flows and were sampled individually
+        unflowed = [pkt for pkt in packets if not pkt['src_ip'] or not pkt['dst_ip']]
+        for pkt in unflowed:
+            protocol_units[pkt['protocol']].append(1)
+            
+        talkers = {ip: self._horvitz_thompson(counts) for ip, counts in talker_units.items()}
+        top_talkers = sorted(talkers.items(), key=lambda x: x[1]['estimate'], reverse=True)[:top_n]
+        
+        return {
+            'sample_rate': self.sample_rate,
+            'confidence_level': 0.95,
+            'sampled_packets': len(packets),
+            'sampled_flows': len(flows),
+            'total_flows': self._horvitz_thompson([1] * len(flows)),
+            'total_packets': self._horvitz_thompson(
+                [flow['packet_count'] for flow in flows.values()] + [1] * len(unflowed)
+            ),
+            'total_bytes': self._horvitz_thompson(
+                [flow['total_bytes'] for flow in flows.values()] +
+                [pkt['packet_size'] for pkt in unflowed]
+            ),
+            'protocol_distribution': {
+                proto: self._horvitz_thompson(counts) for proto, counts in protocol_units.items()
+            },
+            'top_talkers': [{'ip': ip, **estimate} for ip, estimate in top_talkers]
+        }
+        
+    def _hash_keep(self, key: str) -> bool:
+        digest = hashlib.blake2b(key.encode(), digest_size=8, salt=self._salt).digest()
+        return int.from_bytes(digest, 'little') < self._threshold
+        
+    def _horvitz_thompson(self, values: List[float]) -> Dict:
+        # Each unit is kept independently with probability p: sum/p is unbiased and
+        # (1-p)/p^2 * sum(x^2) is an unbiased estimate of its variance
+        p = self.sample_rate
+        observed = sum(values)
+        total = observed / p
+        variance = (1 - p) / (p * p) * sum(v * v for v in values)
+        margin = Z_95 * math.sqrt(variance)
+        
+        return {
+            'estimate': round(total, 2),
+            'lower': round(max(total - margin, observed), 2),
+            'upper': round(total + margin, 2)
+        }
+        
+    def _peek_five_tuple(self, raw: bytes, linktype: int) -> Optional[Tuple]:
+        # Mirrors PCAPParser._extract_metadata for plain Ethernet TCP/UDP; anything
+        # else returns None so the packet is dissected and sampled by keep()
+        if linktype != LINKTYPE_ETHERNET or len(raw) < 14:
+            return None
+            
+        ethertype = struct.unpack_from('!H', raw, 12)[0]
+        offset = 14
+        while ethertype in VLAN_ETHERTYPES and len(raw) >= offset + 4:
+            ethertype = struct.unpack_from('!H', raw, offset + 2)[0]
+            offset += 4
+            
+        if ethertype == ETHERTYPE_ARP:
+            return NON_IP
+            
+        if ethertype == ETHERTYPE_IPV4:
+            if len(raw) < offset + 20:
+                return None
+            ihl = (raw[offset] & 0x0F) * 4
+            frag = struct.unpack_from('!H', raw, offset + 6)[0]
+            if ihl < 20 or frag & 0x3FFF:
+                return None
+            proto = raw[offset + 9]
+            src_ip = socket.inet_ntoa(raw[offset + 12:offset + 16])
+            dst_ip = socket.inet_ntoa(raw[offset + 16:offset + 20])
+            l4 = offset + ihl
+            
+        elif ethertype == ETHERTYPE_IPV6:
+            if len(raw) < offset + 40:
+                return None
+            proto = raw[offset + 6]
+            src_ip = socket.inet_ntop(socket.AF_INET6, raw[offset + 8:offset + 24])
+            dst_ip = socket.inet_ntop(socket.AF_INET6, raw[offset + 24:offset + 40])
+            l4 = offset + 40
+            
+        else:
+            return None
+            
+        if proto == 6 and len(raw) >= l4 + 20:
+            protocol = 'TCP'
+        elif proto == 17 and len(raw) >= l4 + 8:
+            protocol = 'UDP'
+        else:
+            return None
+            
+        src_port, dst_port = struct.unpack_from('!HH', raw, l4)
+        if protocol == 'UDP' and (src_port in TUNNEL_UDP_PORTS or dst_port in TUNNEL_UDP_PORTS):
+            return None
+            
+        return src_ip, dst_ip, protocol, src_port, dst_port
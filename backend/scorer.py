@@ -1,3 +1,4 @@
+import numpy as np
 from typing import Dict, Tuple
 import logging
 
@@ -52,6 +53,22 @@ class RiskScorer:
                 'detections': {}
             }
     
+    def calculate_risk_batch(self, ml_prob: np.ndarray, beacon_score: np.ndarray,
+                             dns_score: np.ndarray, proto_score: np.ndarray) -> np.ndarray:
+        return (
+            ml_prob * self.weights['ml_probability'] +
+            beacon_score * self.weights['beaconing_score'] +
+            dns_score * self.weights['dns_tunnel_score'] +
+            proto_score * self.weights['protocol_anomaly_score']
+        ) * 100
+    
+    def classify_batch(self, scores: np.ndarray) -> np.ndarray:
+        return np.select(
+            [scores >= 75, scores >= 50, scores >= 25],
+            ['Critical', 'High', 'Medium'],
+            default='Low'
+        )
+    
     def _calculate_confidence(self, detections: Dict) -> str:
         signal_count = sum([
             detections.get('ml_probability', 0) > 0.5,
@@ -0,0 +1,102 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import logging
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _fork_http_worker(app, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+        
+    exit_code = 0
+    try:
+        # Every HTTP worker accepts on the socket inherited from the parent
+        uvicorn.Server(uvicorn.Config(app, log_level="info")).run(sockets=[sock])
+    except BaseException:
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve NetScapeX from several processes sharing preloaded models")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=2, help="HTTP worker processes")
+    parser.add_argument('--analysis-workers', type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="Processes that run CPU-heavy analyses")
+    args = parser.parse_args()
+    
+    # Importing the app loads the classifier and detectors once, before any fork
+    import api
+    from workers import AnalysisWorkerPool
+    
+    # Jobs left open by a previous run have no process behind them any more
+    stale = api.job_store.fail_unfinished("Server restarted before the analysis finished")
+    if stale:
+        logger.warning(f"Marked {len(stale)} unfinished jobs from a previous run as failed")
+        
+    pool = AnalysisWorkerPool(api.job_store, args.analysis_workers, on_lost=api.fail_worker_jobs)
+    api.analysis_pool = pool
+    sock = _bind(args.host, args.port)
+    
+    # Freezing moves the preloaded objects out of the collector's reach, so GC passes
+    # in the children do not write to (and un-share) their pages
+    gc.collect()
+    gc.freeze()
+    
+    pool.start()
+    http_pids = [_fork_http_worker(api.app, sock) for _ in range(args.workers)]
+    logger.info(f"Serving on {args.host}:{args.port} with {args.workers} HTTP workers "
+                f"and {args.analysis_workers} analysis workers")
+                
+    stopping = False
+    
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in http_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+                
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    
+    while http_pids:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+            
+        if pid in http_pids:
+            http_pids.remove(pid)
+            if not stopping:
+                logger.warning(f"HTTP worker {pid} exited; restarting")
+                http_pids.append(_fork_http_worker(api.app, sock))
+        elif not stopping:
+            pool.reap(pid)
+            
+    pool.stop()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
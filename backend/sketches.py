@@ -0,0 +1,283 @@
+import hashlib
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _hash64(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+
+class _Bucket:
+    # One Stream-Summary bucket: every monitored key whose counter equals `count`
+    __slots__ = ('count', 'keys', 'prev', 'next')
+    
+    def __init__(self, count: int):
+        self.count = count
+        self.keys = {}  # insertion-ordered set
+        self.prev = None
+        self.next = None
+
+
+class SpaceSaving:
+    # Space-Saving (Metwally et al.) over `capacity` counters. For a stream of total
+    # weight N every key heavier than N/capacity is retained, and each reported count
+    # overestimates the true weight by at most its error term, itself <= N/capacity.
+    # Counters live in a Stream-Summary: an ascending linked list of buckets of equal
+    # count, so a unit update (hit, insert or eviction of the minimum) is O(1).
+    # Weighted updates walk forward past the buckets they overtake.
+    
+    def __init__(self, capacity: int = 64):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+            
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self._bucket_of = {}
+        self._min: Optional[_Bucket] = None
+        
+    def update(self, key: str, weight: int = 1):
+        if weight <= 0:
+            return
+            
+        self.total += weight
+        
+        bucket = self._bucket_of.get(key)
+        if bucket is None and len(self.counts) >= self.capacity:
+            # Evict a minimum key; the newcomer inherits its count as error
+            bucket = self._min
+            evicted = next(iter(bucket.keys))
+            del bucket.keys[evicted]
+            del self._bucket_of[evicted]
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.errors[key] = bucket.count
+        elif bucket is None:
+            self.errors[key] = 0
+        else:
+            del bucket.keys[key]
+            
+        count = (bucket.count if bucket is not None else 0) + weight
+        self.counts[key] = count
+        self._place(key, count, bucket)
+        
+        if bucket is not None and not bucket.keys:
+            self._unlink(bucket)
+            
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        # Mergeable summaries (Agarwal et al.): a key missing from a full summary may
+        # still have weight up to that summary's minimum counter
+        self_floor = self._min_count() if len(self.counts) >= self.capacity else 0
+        other_floor = other._min_count() if len(other.counts) >= other.capacity else 0
+        
+        combined = {}
+        for key in set(self.counts) | set(other.counts):
+            count = self.counts.get(key, self_floor) + other.counts.get(key, other_floor)
+            error = self.errors.get(key, self_floor) + other.errors.get(key, other_floor)
+            combined[key] = (count, error)
+            
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        merged.total = self.total + other.total
+        for key, (count, error) in heapq.nlargest(merged.capacity, combined.items(), key=lambda x: x[1][0]):
+            merged.counts[key] = count
+            merged.errors[key] = error
+        merged._rebuild_buckets()
+        return merged
+        
+    def top(self, n: int = 10) -> List[Tuple[str, int, int]]:
+        ranked = sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:n]
+        return [(key, count, self.errors[key]) for key, count in ranked]
+        
+    def error_bound(self) -> float:
+        return self.total / self.capacity
+        
+    def __getstate__(self) -> Dict:
+        # Summaries cross process boundaries in batch mode; ship counters, not the list
+        return {'capacity': self.capacity, 'total': self.total, 'counts': self.counts, 'errors': self.errors}
+        
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._rebuild_buckets()
+        
+    def _min_count(self) -> int:
+        return self._min.count if self._min is not None else 0
+        
+    def _place(self, key: str, count: int, after: Optional[_Bucket]):
+        # Buckets ascend by count; start just after the key's previous bucket (or at the head)
+        prev, node = (after, after.next) if after is not None else (None, self._min)
+        while node is not None and node.count < count:
+            prev, node = node, node.next
+            
+        if node is None or node.count != count:
+            bucket = _Bucket(count)
+            bucket.prev, bucket.next = prev, node
+            if prev is not None:
+                prev.next = bucket
+            else:
+                self._min = bucket
+            if node is not None:
+                node.prev = bucket
+            node = bucket
+            
+        node.keys[key] = None
+        self._bucket_of[key] = node
+        
+    def _unlink(self, bucket: _Bucket):
+        if bucket.prev is not None:
+            bucket.prev.next = bucket.next
+        else:
+            self._min = bucket.next
+        if bucket.next is not None:
+            bucket.next.prev = bucket.prev
+            
+    def _rebuild_buckets(self):
+        self._bucket_of = {}
+        self._min = None
+        tail = None
+        for key, count in sorted(self.counts.items(), key=lambda x: x[1]):
+            if tail is not None and tail.count == count:
+                tail.keys[key] = None
+                self._bucket_of[key] = tail
+            else:
+                self._place(key, count, tail)
+                tail = self._bucket_of[key]
+
+
+class HyperLogLog:
+    # HyperLogLog (Flajolet et al.) with 2^precision one-byte registers. The standard
+    # error of the distinct-count estimate is 1.04 / sqrt(2^precision), about 0.81%
+    # at the default precision of 14 (16 KiB). Merging is a register-wise max.
+    
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+            
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        self._value_bits = 64 - precision
+        self._value_mask = (1 << self._value_bits) - 1
+        
+    def add(self, key: str):
+        h = _hash64(key)
+        idx = h >> self._value_bits
+        rank = self._value_bits - (h & self._value_mask).bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+            
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+            
+        return round(estimate)
+        
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+            
+        merged = HyperLogLog(self.precision)
+        merged.registers = bytearray(map(max, self.registers, other.registers))
+        return merged
+        
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+
+class TrafficSummary:
+    # Bounded-memory streaming statistics updated once per packet; summaries built
+    # over separate shards or time windows combine with merge()
+    
+    def __init__(self, capacity: int = 64, precision: int = 14):
+        self.capacity = capacity
+        self.precision = precision
+        self.packets = 0
+        self.bytes = 0
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.protocols = {}  # exact: the protocol space is tiny
+        self.talkers_by_packets = SpaceSaving(capacity)
+        self.talkers_by_bytes = SpaceSaving(capacity)
+        self.src_hosts = HyperLogLog(precision)
+        self.dst_hosts = HyperLogLog(precision)
+        
+    def update(self, pkt: Dict):
+        self.packets += 1
+        self.bytes += pkt['packet_size']
+        
+        ts = pkt['timestamp']
+        if self.start_time is None or ts < self.start_time:
+            self.start_time = ts
+        if self.end_time is None or ts > self.end_time:
+            self.end_time = ts
+            
+        proto = pkt['protocol']
+        self.protocols[proto] = self.protocols.get(proto, 0) + 1
+        
+        src_ip = pkt['src_ip']
+        if src_ip:
+            self.talkers_by_packets.update(src_ip)
+            self.talkers_by_bytes.update(src_ip, pkt['packet_size'])
+            self.src_hosts.add(src_ip)
+        if pkt['dst_ip']:
+            self.dst_hosts.add(pkt['dst_ip'])
+            
+    def merge(self, other: 'TrafficSummary') -> 'TrafficSummary':
+        merged = TrafficSummary(max(self.capacity, other.capacity), self.precision)
+        merged.packets = self.packets + other.packets
+        merged.bytes = self.bytes + other.bytes
+        
+        starts = [t for t in (self.start_time, other.start_time) if t is not None]
+        ends = [t for t in (self.end_time, other.end_time) if t is not None]
+        merged.start_time = min(starts) if starts else None
+        merged.end_time = max(ends) if ends else None
+        
+        merged.protocols = dict(self.protocols)
+        for proto, count in other.protocols.items():
+            merged.protocols[proto] = merged.protocols.get(proto, 0) + count
+            
+        merged.talkers_by_packets = self.talkers_by_packets.merge(other.talkers_by_packets)
+        merged.talkers_by_bytes = self.talkers_by_bytes.merge(other.talkers_by_bytes)
+        merged.src_hosts = self.src_hosts.merge(other.src_hosts)
+        merged.dst_hosts = self.dst_hosts.merge(other.dst_hosts)
+        return merged
+        
+    def get_top_talkers(self, n: int = 10, by: str = 'packets') -> List[Tuple[str, int]]:
+        sketch = self.talkers_by_bytes if by == 'bytes' else self.talkers_by_packets
+        return [(ip, count) for ip, count, _ in sketch.top(n)]
+        
+    def get_protocol_distribution(self) -> Dict[str, int]:
+        return dict(self.protocols)
+        
+    def to_dict(self, n: int = 10) -> Dict:
+        return {
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'protocol_distribution': self.get_protocol_distribution(),
+            'distinct_src_hosts': self.src_hosts.count(),
+            'distinct_dst_hosts': self.dst_hosts.count(),
+            'distinct_hosts_relative_error': round(self.src_hosts.relative_error(), 4),
+            'top_talkers_by_packets': [
+                {'ip': ip, 'packet_count': count, 'max_overestimate': error}
+                for ip, count, error in self.talkers_by_packets.top(n)
+            ],
+            'top_talkers_by_bytes': [
+                {'ip': ip, 'bytes': count, 'max_overestimate': error}
+                for ip, count, error in self.talkers_by_bytes.top(n)
+            ],
+            'talker_error_bound': {
+                'packets': round(self.talkers_by_packets.error_bound(), 2),
+                'bytes': round(self.talkers_by_bytes.error_bound(), 2)
+            }
+        }
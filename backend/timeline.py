@@ -0,0 +1,132 @@
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+BASE_BINS = 65536
+MIN_BIN_WIDTH = 0.001
+DEFAULT_POINTS = 200
+RISK_EVENT_LEVELS = ('High', 'Critical')
+COUNT_SERIES = ('packets', 'bytes', 'new_flows', 'risk_events')
+
+
+class TrafficTimeline:
+    # Multi-resolution time histograms. Level 0 holds the finest bins and every level
+    # above it halves the bin count by pairwise reduction, so a zoom range is answered
+    # from the finest level that still fits the point budget without touching packets.
+    
+    def __init__(self, start: float, bin_width: float, base: Dict[str, np.ndarray]):
+        self.start = start
+        self.bin_width = bin_width
+        self.end = start + bin_width * len(base['packets'])
+        self.levels = [base]
+        while len(self.levels[-1]['packets']) > 1:
+            self.levels.append(self._halve(self.levels[-1]))
+            
+    @classmethod
+    def from_analysis(cls, packets: List[Dict], flows: Dict[int, Dict], analyzed_flows: List[Dict]) -> 'TrafficTimeline':
+        # analyzed_flows must still be in flow order, i.e. before sorting by risk
+        assessments = [a['risk_assessment'] for a in analyzed_flows]
+        
+        return cls.build(
+            np.fromiter((p['timestamp'] for p in packets), dtype=np.float64, count=len(packets)),
+            np.fromiter((p['packet_size'] for p in packets), dtype=np.int64, count=len(packets)),
+            np.fromiter((f['start_time'] for f in flows.values()), dtype=np.float64, count=len(flows)),
+            np.fromiter((a['risk_score'] for a in assessments), dtype=np.float64, count=len(assessments)),
+            np.fromiter((a['risk_level'] in RISK_EVENT_LEVELS for a in assessments), dtype=bool, count=len(assessments))
+        )
+        
+    @classmethod
+    def build(cls, packet_times: np.ndarray, packet_sizes: np.ndarray, flow_starts: np.ndarray,
+              flow_risk: np.ndarray, risk_events: np.ndarray) -> 'TrafficTimeline':
+        if len(packet_times) == 0:
+            empty = {name: np.zeros(1, dtype=np.int64) for name in COUNT_SERIES}
+            empty['max_risk'] = np.zeros(1)
+            return cls(0.0, MIN_BIN_WIDTH, empty)
+            
+        start = float(packet_times.min())
+        span = float(packet_times.max()) - start
+        n_bins = int(min(BASE_BINS, max(np.ceil(span / MIN_BIN_WIDTH), 1)))
+        bin_width = max(span / n_bins, MIN_BIN_WIDTH)
+        
+        def bin_index(times: np.ndarray) -> np.ndarray:
+            return np.clip(((times - start) / bin_width).astype(np.int64), 0, n_bins - 1)
+            
+        packet_bins = bin_index(packet_times)
+        flow_bins = bin_index(flow_starts)
+        
+        max_risk = np.zeros(n_bins)
+        np.maximum.at(max_risk, flow_bins, flow_risk)
+        
+        base = {
+            'packets': np.bincount(packet_bins, minlength=n_bins),
+            'bytes': np.bincount(packet_bins, weights=packet_sizes, minlength=n_bins).astype(np.int64),
+            'new_flows': np.bincount(flow_bins, minlength=n_bins),
+            'risk_events': np.bincount(flow_bins, weights=risk_events, minlength=n_bins).astype(np.int64),
+            'max_risk': max_risk
+        }
+        return cls(start, bin_width, base)
+        
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              points: int = DEFAULT_POINTS) -> Dict:
+        if points < 1:
+            raise ValueError("points must be at least 1")
+            
+        start = self.start if start is None else max(start, self.start)
+        end = self.end if end is None else min(end, self.end)
+        if end <= start:
+            raise ValueError("Range end must be after its start")
+            
+        for level, bins in enumerate(self.levels):
+            width = self.bin_width * 2 ** level
+            first = int((start - self.start) // width)
+            last = min(max(int(np.ceil((end - self.start) / width)), first + 1), len(bins['packets']))
+            if last - first <= points:
+                break
+                
+        times = self.start + np.arange(first, last) * width
+        series = {name: bins[name][first:last].tolist() for name in COUNT_SERIES}
+        series['max_risk'] = np.round(bins['max_risk'][first:last], 2).tolist()
+        
+        return {
+            'start': start,
+            'end': end,
+            'bin_width': width,
+            'level': level,
+            'points': [
+                {'time': round(float(t), 6), **{name: values[i] for name, values in series.items()}}
+                for i, t in enumerate(times)
+            ]
+        }
+        
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {f"timeline_{name}": values for name, values in self.levels[0].items()}
+        arrays['timeline_start'] = np.array(self.start)
+        arrays['timeline_bin_width'] = np.array(self.bin_width)
+        return arrays
+        
+    @classmethod
+    def from_arrays(cls, arrays) -> 'TrafficTimeline':
+        return cls(
+            float(arrays['timeline_start']),
+            float(arrays['timeline_bin_width']),
+            {name: arrays[f"timeline_{name}"] for name in COUNT_SERIES + ('max_risk',)}
+        )
+        
+    @classmethod
+    def load(cls, path: str) -> 'TrafficTimeline':
+        # npz members decompress on access, so the rest of the feature store is never read
+        with np.load(path) as data:
+            if 'timeline_packets' not in data.files:
+                raise KeyError(f"No timeline in {path}")
+            return cls.from_arrays(data)
+            
+    def _halve(self, bins: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        halved = {}
+        for name, values in bins.items():
+            if len(values) % 2:
+                values = np.append(values, 0)
+            pairs = values.reshape(-1, 2)
+            halved[name] = pairs.max(axis=1) if name == 'max_risk' else pairs.sum(axis=1)
+        return halved
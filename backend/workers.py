@@ -0,0 +1,126 @@
+import importlib
+import os
+import signal
+import time
+from typing import Callable, List, Optional
+import logging
+
+from jobstore import JobStore
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisWorkerPool:
+    # Long-lived analysis processes forked from a parent that has already loaded the
+    # models, so the classifier arrays are shared copy-on-write rather than reloaded.
+    # HTTP workers forked later only hand work over. Tasks are queued in the job store
+    # rather than a multiprocessing.Queue: a worker killed while waiting on a Queue
+    # keeps its read lock forever, whereas SQLite locks are released with the process.
+    # on_lost(pid) is called when a worker dies, so the task it was running can be
+    # failed rather than left waiting forever.
+    
+    def __init__(self, job_store: JobStore, processes: int = 1,
+                 on_lost: Optional[Callable[[int], None]] = None, poll_interval: float = 0.25):
+        if processes < 1:
+            raise ValueError("processes must be at least 1")
+        self.job_store = job_store
+        self.processes = processes
+        self.on_lost = on_lost
+        self.poll_interval = poll_interval
+        self._pids: List[int] = []
+        self._owner = os.getpid()
+        self._stopping = False
+        
+    def start(self):
+        while len(self._pids) < self.processes:
+            self._pids.append(self._fork())
+        logger.info(f"Started {self.processes} analysis workers")
+        
+    def submit(self, func: Callable, job_id: str, *args):
+        # func must be importable by name and args JSON-serialisable
+        self.job_store.enqueue_task(job_id, f"{func.__module__}:{func.__qualname__}", list(args))
+        
+    def reap(self, pid: int) -> bool:
+        # Replace a worker that died unexpectedly; returns False if pid is not ours
+        if pid not in self._pids:
+            return False
+        logger.warning(f"Analysis worker {pid} exited; restarting")
+        self._lost(pid)
+        self._pids[self._pids.index(pid)] = self._fork()
+        return True
+        
+    def stop(self, timeout: float = 10.0):
+        if os.getpid() != self._owner:
+            return
+            
+        # SIGTERM lets each worker finish its current task before exiting
+        for pid in self._pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                continue
+                
+        deadline = time.monotonic() + timeout
+        for pid in self._pids:
+            try:
+                while time.monotonic() < deadline:
+                    if os.waitpid(pid, os.WNOHANG)[0]:
+                        break
+                    time.sleep(0.1)
+                else:
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    self._lost(pid)
+            except ChildProcessError:
+                # Already reaped by the serving parent's wait loop
+                continue
+        self._pids = []
+        
+    def _lost(self, pid: int):
+        if self.on_lost is not None:
+            try:
+                self.on_lost(pid)
+            except Exception as e:
+                logger.error(f"Could not fail the task of analysis worker {pid}: {str(e)}")
+                
+    def _fork(self) -> int:
+        pid = os.fork()
+        if pid:
+            return pid
+            
+        exit_code = 0
+        try:
+            self._work()
+        except BaseException:
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+            
+    def _work(self):
+        # Ctrl+C reaches the whole process group; the serving parent coordinates shutdown
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        self._stopping = False
+        pid = os.getpid()
+        
+        while not self._stopping:
+            task = self.job_store.claim_task(pid)
+            if task is None:
+                time.sleep(self.poll_interval)
+                continue
+                
+            job_id, func_name, args = task
+            try:
+                self._resolve(func_name)(job_id, *args)
+            except Exception as e:
+                logger.error(f"Analysis task {func_name} failed: {str(e)}")
+                
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+        
+    def _resolve(self, func_name: str) -> Callable:
+        module_name, qualname = func_name.split(':')
+        target = importlib.import_module(module_name)
+        for attr in qualname.split('.'):
+            target = getattr(target, attr)
+        return target
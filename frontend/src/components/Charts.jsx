@@ -1,4 +1,4 @@
-import { PieChart, Pie, Cell, BarChart, Bar, XAxis, YAxis, Tooltip, ResponsiveContainer } from 'recharts'
+import { PieChart, Pie, Cell, BarChart, Bar, AreaChart, Area, XAxis, YAxis, Tooltip, ResponsiveContainer } from 'recharts'
 
 export default function Charts({ analysisData }) {
   const protocolData = Object.entries(analysisData.protocol_distribution || {}).map(([name, value]) => ({
@@ -19,6 +19,12 @@ export default function Charts({ analysisData }) {
     value
   }))
 
+  const timelineStart = analysisData.timeline?.[0]?.time ?? 0
+  const timelineData = (analysisData.timeline || []).map(point => ({
+    ...point,
+    offset: Math.round(point.time - timelineStart)
+  }))
+
   const COLORS = {
     TCP: '#00d4ff',
     UDP: '#a855f7',
@@ -95,6 +101,29 @@ export default function Charts({ analysisData }) {
           </ResponsiveContainer>
         </div>
       </div>
+
+      {timelineData.length > 0 && (
+        <div className="mt-8">
+          <p className="text-gray-400 text-sm mb-4 text-center">Traffic Timeline</p>
+          <ResponsiveContainer width="100%" height={200}>
+            <AreaChart data={timelineData}>
+              <XAxis dataKey="offset" stroke="#6b7280" style={{ fontSize: '12px' }} unit="s" />
+              <YAxis yAxisId="packets" stroke="#6b7280" style={{ fontSize: '12px' }} />
+              <YAxis yAxisId="risk" orientation="right" stroke="#6b7280" style={{ fontSize: '12px' }} allowDecimals={false} />
+              <Tooltip 
+                contentStyle={{ 
+                  background: 'rgba(10, 14, 39, 0.95)', 
+                  border: '1px solid rgba(255,255,255,0.1)',
+                  borderRadius: '8px',
+                  color: 'white'
+                }}
+              />
+              <Area yAxisId="packets" type="monotone" dataKey="packets" stroke={COLORS.TCP} fill={COLORS.TCP} fillOpacity={0.2} />
+              <Area yAxisId="risk" type="step" dataKey="risk_events" stroke={COLORS.Critical} fill={COLORS.Critical} fillOpacity={0.3} />
+            </AreaChart>
+          </ResponsiveContainer>
+        </div>
+      )}
     </div>
   )
 }
@@ -14,7 +14,9 @@ export default function UploadCard({ onFileSelect, disabled }) {
     onDrop,
     accept: {
       'application/vnd.tcpdump.pcap': ['.pcap'],
-      'application/x-pcapng': ['.pcapng']
+      'application/x-pcapng': ['.pcapng'],
+      'application/gzip': ['.gz'],
+      'application/x-xz': ['.xz']
     },
     maxFiles: 1,
     disabled
@@ -47,7 +49,7 @@ export default function UploadCard({ onFileSelect, disabled }) {
         </p>
         
         <p className="text-sm text-gray-500">
-          Supported formats: .pcap, .pcapng (Max 500MB)
+          Supported formats: .pcap, .pcapng, also .gz/.xz compressed (Max 500MB)
         </p>
       </div>
     </motion.div>
@@ -4,7 +4,14 @@ import { motion } from 'framer-motion'
 import { Upload as UploadIcon, FileText, AlertCircle, CheckCircle } from 'lucide-react'
 import UploadCard from '../components/UploadCard'
 import LoadingSpinner from '../components/LoadingSpinner'
-import { uploadPCAP, analyzePCAP } from '../utils/api'
+import { uploadPCAP, startAnalysis, subscribeToJob } from '../utils/api'
+
+const ANALYSIS_STAGES = [
+  { key: 'parsing', label: 'Parsing packets' },
+  { key: 'reconstructing', label: 'Reconstructing flows' },
+  { key: 'extracting_features', label: 'Extracting features' },
+  { key: 'scoring', label: 'Running detections & risk scoring' }
+]
 
 export default function Upload({ setAnalysisData }) {
   const navigate = useNavigate()
@@ -14,6 +21,8 @@ export default function Upload({ setAnalysisData }) {
   const [uploadProgress, setUploadProgress] = useState(0)
   const [error, setError] = useState(null)
   const [uploadSuccess, setUploadSuccess] = useState(false)
+  const [progress, setProgress] = useState(null)
+  const [earlyFlows, setEarlyFlows] = useState([])
 
   const handleFileSelect = (selectedFile) => {
     setFile(selectedFile)
@@ -52,14 +61,26 @@ export default function Upload({ setAnalysisData }) {
   const handleAnalyze = async (filename) => {
     setAnalyzing(true)
     setError(null)
+    setProgress(null)
+    setEarlyFlows([])
 
     try {
-      const result = await analyzePCAP(filename)
-      setAnalysisData(result)
-      
-      setTimeout(() => {
-        navigate('/dashboard')
-      }, 1000)
+      const { job_id } = await startAnalysis(filename)
+
+      subscribeToJob(job_id, {
+        onProgress: setProgress,
+        onFlow: (flow) => setEarlyFlows(prev => [flow, ...prev].slice(0, 5)),
+        onComplete: (result) => {
+          setAnalysisData(result)
+          setTimeout(() => {
+            navigate('/dashboard')
+          }, 1000)
+        },
+        onError: (err) => {
+          setError(err.message || 'Analysis failed. Please try again.')
+          setAnalyzing(false)
+        }
+      })
 
     } catch (err) {
       setError(err.message || 'Analysis failed. Please try again.')
@@ -67,6 +88,8 @@ export default function Upload({ setAnalysisData }) {
     }
   }
 
+  const stageIndex = ANALYSIS_STAGES.findIndex(stage => stage.key === progress?.stage)
+
   return (
     <div className="min-h-screen flex items-center justify-center px-4 py-20">
       <div className="max-w-4xl w-full">
@@ -151,12 +174,34 @@ export default function Upload({ setAnalysisData }) {
                 Running ML models and threat detection modules...
               </p>
               <div className="mt-6 space-y-2 text-sm text-gray-500">
-                <p>✓ Parsing packets</p>
-                <p>✓ Reconstructing flows</p>
-                <p className="text-cyan-400">→ Extracting features</p>
-                <p>○ Running detections</p>
-                <p>○ Calculating risk scores</p>
+                {ANALYSIS_STAGES.map((stage, idx) => (
+                  <p key={stage.key} className={idx === stageIndex ? 'text-cyan-400' : ''}>
+                    {idx < stageIndex ? '✓' : idx === stageIndex ? '→' : '○'} {stage.label}
+                  </p>
+                ))}
               </div>
+              {progress && (
+                <div className="mt-6 grid grid-cols-2 gap-2 text-sm text-gray-400">
+                  {progress.packets !== undefined && <p>{progress.packets.toLocaleString()} packets</p>}
+                  {progress.packets_per_sec !== undefined && <p>{progress.packets_per_sec.toLocaleString()} pkts/s</p>}
+                  {progress.flows_so_far !== undefined && <p>{progress.flows_so_far.toLocaleString()} flows so far</p>}
+                  {progress.flows_scored !== undefined && <p>{progress.flows_scored.toLocaleString()} / {progress.flows.toLocaleString()} flows scored</p>}
+                  {progress.bytes_parsed !== undefined && progress.total_bytes > 0 && (
+                    <p>{Math.round(100 * progress.bytes_parsed / progress.total_bytes)}% parsed</p>
+                  )}
+                  {progress.eta_seconds != null && <p>ETA {Math.ceil(progress.eta_seconds)}s</p>}
+                </div>
+              )}
+              {earlyFlows.length > 0 && (
+                <div className="mt-6 text-left text-sm">
+                  <p className="font-semibold text-red-400 mb-2">High-risk flows found so far</p>
+                  {earlyFlows.map(flow => (
+                    <p key={flow.flow_id} className="text-gray-400">
+                      {flow.flow_id}: {flow.src_ip} → {flow.dst_ip}:{flow.dst_port} ({flow.risk_assessment.risk_level}, {flow.risk_assessment.risk_score})
+                    </p>
+                  ))}
+                </div>
+              )}
             </motion.div>
           )}
 
@@ -183,7 +228,7 @@ export default function Upload({ setAnalysisData }) {
             className="mt-12 grid md:grid-cols-3 gap-6"
           >
             {[
-              { title: 'Supported Formats', desc: '.pcap, .pcapng' },
+              { title: 'Supported Formats', desc: '.pcap, .pcapng, .gz, .xz' },
               { title: 'Max File Size', desc: '500 MB' },
               { title: 'Privacy', desc: 'Metadata only' }
             ].map((item, idx) => (
@@ -27,6 +27,74 @@ export const analyzePCAP = async (filename) => {
   }
 }
 
+export const startAnalysis = async (filename) => {
+  try {
+    const response = await axios.post(`${API_BASE_URL}/analyze/start`, { filename })
+    return response.data
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Analysis failed')
+  }
+}
+
+export const subscribeToJob = (jobId, { onProgress, onFlow, onComplete, onError } = {}) => {
+  const source = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`)
+
+  source.addEventListener('progress', (e) => onProgress?.(JSON.parse(e.data)))
+  source.addEventListener('flow', (e) => onFlow?.(JSON.parse(e.data)))
+  source.addEventListener('complete', (e) => {
+    source.close()
+    onComplete?.(JSON.parse(e.data))
+  })
+  source.addEventListener('error', (e) => {
+    source.close()
+    onError?.(new Error(e.data ? JSON.parse(e.data).detail : 'Analysis stream interrupted'))
+  })
+
+  return () => source.close()
+}
+
+export const triagePCAP = async (filename, sampleRate = 0.05) => {
+  try {
+    const response = await axios.post(`${API_BASE_URL}/analyze`, {
+      filename,
+      mode: 'triage',
+      sample_rate: sampleRate
+    })
+    return response.data
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Triage failed')
+  }
+}
+
+export const analyzeBatch = async ({ filenames, directory }) => {
+  try {
+    const response = await axios.post(`${API_BASE_URL}/analyze/batch`, { filenames, directory })
+    return response.data
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Batch analysis failed')
+  }
+}
+
+export const getJobStatus = async (jobId) => {
+  try {
+    const response = await axios.get(`${API_BASE_URL}/jobs/${jobId}`)
+    return response.data
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Job lookup failed')
+  }
+}
+
+export const getTimeline = async (filename, { start, end, points } = {}) => {
+  try {
+    const response = await axios.get(`${API_BASE_URL}/timeline/${filename}`, {
+      params: { start, end, points }
+    })
+    return response.data
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Timeline lookup failed')
+  }
+}
+
 export const downloadReport = async (filename) => {
   try {
     const response = await axios.get(`${API_BASE_URL}/download/${filename}`, {